@@ -0,0 +1,139 @@
+"""Compare task, status and label page throughput under WSGI and ASGI.
+
+Starts the project twice against the same database -- gunicorn with the
+sync views, then uvicorn with ``ASYNC_VIEWS=True`` -- logs in as an
+existing user and hammers each page with concurrent clients.
+
+    uv run python benchmarks/async_views.py --username admin --password x
+
+The database must already contain data (see ``manage.py import_tasks``);
+uvicorn is not a project dependency and must be installed separately.
+"""
+
+import argparse
+import http.cookiejar
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ["/tasks/", "/tasks/?sort=-id", "/statuses/", "/labels/"]
+
+
+def server_env(async_views):
+    env = dict(os.environ)
+    env.update({
+        "ASYNC_VIEWS": str(async_views),
+        "ALLOWED_HOSTS": "127.0.0.1,localhost",
+        "SECURE_SSL_REDIRECT": "False",
+        "SESSION_COOKIE_SECURE": "False",
+        "CSRF_COOKIE_SECURE": "False",
+    })
+    return env
+
+
+def start_server(kind, port, workers):
+    if kind == "wsgi":
+        cmd = ["gunicorn", "task_manager.wsgi", "--bind",
+               f"127.0.0.1:{port}", "--workers", str(workers),
+               "--threads", "4"]
+    else:
+        cmd = ["uvicorn", "task_manager.asgi:application", "--port",
+               str(port), "--workers", str(workers), "--no-access-log"]
+    process = subprocess.Popen(cmd, cwd=ROOT, env=server_env(kind == "asgi"),
+                               stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base}/login/", timeout=1)
+            return process, base
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit(f"{kind} server did not start on port {port}")
+
+
+def login(base, username, password):
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(jar))
+    html = opener.open(f"{base}/login/").read().decode()
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', html)
+    data = urllib.parse.urlencode({
+        "username": username, "password": password,
+        "csrfmiddlewaretoken": token.group(1),
+    }).encode()
+    opener.open(urllib.request.Request(
+        f"{base}/login/", data=data, headers={"Referer": f"{base}/login/"}))
+    if not any(cookie.name == "sessionid" for cookie in jar):
+        sys.exit("Login failed, check --username/--password")
+    return opener
+
+
+def hammer(opener, url, requests):
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        with opener.open(url) as response:
+            response.read()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def measure(opener, url, concurrency, requests):
+    hammer(opener, url, 5)  # warm up
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = pool.map(lambda _: hammer(opener, url, requests),
+                           range(concurrency))
+        latencies = sorted(t for batch in results for t in batch)
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50,
+                        help="Requests per client and page.")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    results = {}
+    for kind in ("wsgi", "asgi"):
+        process, base = start_server(kind, args.port, args.workers)
+        try:
+            opener = login(base, args.username, args.password)
+            for page in PAGES:
+                results[kind, page] = measure(opener, base + page,
+                                              args.concurrency, args.requests)
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"{'page':<20} {'server':<6} {'req/s':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8}")
+    for page in PAGES:
+        for kind in ("wsgi", "asgi"):
+            r = results[kind, page]
+            print(f"{page:<20} {kind:<6} {r['rps']:>8.1f} {r['p50']:>8.1f} "
+                  f"{r['p95']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""First-request latency of a new worker, with and without WARM_UP.
+
+Seeds a new SQLite file, then for each profile starts ``--runs`` fresh
+processes that each load the WSGI application as a gunicorn worker
+does, run the warm-up hook if the profile has it, and time their first
+requests: the login page, logging in, the task list, a filtered task
+list and a task's edit form. A second task list request shows the warm
+latency. Prints the median of each.
+
+    uv run python benchmarks/cold_start.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+USERNAME = "cold0"
+PASSWORD = "cold-password"
+
+SETUP = f"""
+from django.contrib.auth import get_user_model
+user = get_user_model().objects.get(username={USERNAME!r})
+user.set_password({PASSWORD!r})
+user.save()
+"""
+
+
+def run_worker(warm):
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "task_manager.settings")
+    from django.core.wsgi import get_wsgi_application
+
+    get_wsgi_application()
+    timings = {}
+    if warm:
+        from task_manager.warmup import warm_up
+
+        started = time.perf_counter()
+        warm_up()
+        timings["warm_up"] = time.perf_counter() - started
+
+    from django.test import Client
+
+    from task_manager.statuses.models import Status
+    from task_manager.tasks.models import Task
+
+    client = Client()
+    status = Status.objects.values_list("id", flat=True).first()
+    task = Task.objects.values_list("id", flat=True).first()
+    requests = [
+        ("login_page", "get", "/login/", None),
+        ("login", "post", "/login/",
+         {"username": USERNAME, "password": PASSWORD}),
+        ("task_list", "get", "/tasks/", None),
+        ("filter", "get", f"/tasks/?status={status}", None),
+        ("edit_form", "get", f"/tasks/{task}/update/", None),
+        ("task_list_again", "get", "/tasks/", None),
+    ]
+    for name, method, path, data in requests:
+        started = time.perf_counter()
+        response = getattr(client, method)(path, data)
+        timings[name] = time.perf_counter() - started
+        if response.status_code not in (200, 302):
+            sys.exit(f"{path}: {response.status_code}")
+    print(json.dumps(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--worker", choices=["cold", "warm"],
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return run_worker(args.worker == "warm")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SECRET_KEY="benchmark", DEBUG="False",
+                   ALLOWED_HOSTS="testserver", SECURE_SSL_REDIRECT="False",
+                   DATABASE_URL=f"sqlite:///{Path(tmp) / 'db.sqlite3'}")
+        for command in (["migrate"],
+                        ["seed_scale", "--prefix", "cold",
+                         "--tasks", str(args.tasks)],
+                        ["shell", "-c", SETUP]):
+            subprocess.run([sys.executable, "manage.py", *command], cwd=ROOT,
+                           env=env, check=True, stdout=subprocess.DEVNULL)
+        results = {}
+        for profile in ("cold", "warm"):
+            runs = [json.loads(subprocess.run(
+                [sys.executable, __file__, "--worker", profile], cwd=ROOT,
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout) for _ in range(args.runs)]
+            results[profile] = {name: statistics.median(r[name] for r in runs)
+                                for name in runs[0]}
+
+    names = list(results["warm"])
+    print(f"median of {args.runs} runs, ms")
+    print(f"{'request':<16} {'cold':>8} {'warm':>8}")
+    for name in names:
+        cold = results["cold"].get(name)
+        print(f"{name:<16} "
+              f"{'-' if cold is None else f'{cold * 1000:.1f}':>8} "
+              f"{results['warm'][name] * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
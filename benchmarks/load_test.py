@@ -0,0 +1,378 @@
+"""Concurrent load test of ``gunicorn task_manager.wsgi``.
+
+Prepares a database (a fresh SQLite file by default, or ``--database-url``
+for a local Postgres), seeds it with ``manage.py seed_scale``, starts
+gunicorn with the chosen workers and threads, logs in ``--users`` virtual
+users through the login form and has them run a weighted mix of list,
+filter, detail, create, update and delete requests for ``--duration``
+seconds. Prints throughput, latency percentiles and error rate per
+endpoint.
+
+    uv run python benchmarks/load_test.py --users 50 --workers 4 \\
+        --threads 4 --mix list=40,filter=30,detail=20,create=4,update=4,delete=2
+
+Only the standard library is used: the client is a small asyncio HTTP/1.1
+client, one connection per request.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PREFIX = "load"
+PASSWORD = "load-password"
+DEFAULT_MIX = "list=40,filter=30,detail=20,create=4,update=4,delete=2"
+
+# Runs in ``manage.py shell``: give the virtual users a password and print
+# the ids the traffic mix needs.
+SETUP = """
+import json
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+
+User = get_user_model()
+names = [f"{prefix}{{i}}" for i in range({users})]
+User.objects.filter(username__in=names).update(
+    password=make_password({password!r}))
+ids = dict(User.objects.filter(username__in=names)
+           .values_list("username", "id"))
+own = {{}}
+for name, user_id in ids.items():
+    own[name] = list(Task.objects.filter(author_id=user_id)
+                     .values_list("id", flat=True)[:200])
+print(json.dumps({{
+    "users": list(ids),
+    "user_ids": list(User.objects.values_list("id", flat=True)[:1000]),
+    "statuses": list(Status.objects.values_list("id", flat=True)),
+    "labels": list(Label.objects.values_list("id", flat=True)[:1000]),
+    # Shared targets exclude the tasks virtual users may delete.
+    "tasks": list(Task.objects.exclude(author_id__in=ids.values())
+                  .values_list("id", flat=True).order_by("?")[:5000]),
+    "own_tasks": own,
+}}))
+"""
+
+
+def server_env(database_url):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "ALLOWED_HOSTS": "127.0.0.1,localhost",
+        "SECURE_SSL_REDIRECT": "False",
+        "SESSION_COOKIE_SECURE": "False",
+        "CSRF_COOKIE_SECURE": "False",
+    })
+    env.setdefault("SECRET_KEY", "load-test")
+    return env
+
+
+def manage(env, *args, capture=False):
+    return subprocess.run(
+        [sys.executable, "manage.py", *args], cwd=ROOT, env=env, check=True,
+        text=True, stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+    ).stdout
+
+
+def prepare(env, args):
+    if args.seed_tasks:
+        manage(env, "migrate", "--noinput")
+        print(f"Seeding {args.seed_tasks} tasks...", flush=True)
+        manage(env, "seed_scale", "--prefix", PREFIX,
+               "--tasks", str(args.seed_tasks),
+               "--users", str(max(args.users, args.seed_tasks // 100)),
+               "--labels", str(max(10, args.seed_tasks // 500)))
+    code = SETUP.format(prefix=PREFIX, users=args.users, password=PASSWORD)
+    output = manage(env, "shell", "-c", code, capture=True)
+    # The JSON is the last line; shell may print a banner first.
+    data = json.loads(output.strip().splitlines()[-1])
+    if not data["users"]:
+        sys.exit(f"No {PREFIX}* users in the database; use --seed-tasks.")
+    return data
+
+
+def start_server(env, port, workers, threads):
+    cmd = [sys.executable, "-m", "gunicorn", "task_manager.wsgi",
+           "--bind", f"127.0.0.1:{port}",
+           "--workers", str(workers), "--threads", str(threads)]
+    process = subprocess.Popen(cmd, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base}/login/", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit(f"gunicorn did not start on port {port}")
+
+
+class Session:
+    """Cookie-keeping HTTP/1.1 client for one virtual user."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.cookies = {}
+
+    async def request(self, method, path, data=None):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            body = urllib.parse.urlencode(data or {}, doseq=True).encode()
+            headers = [
+                f"{method} {path} HTTP/1.1",
+                f"Host: {self.host}:{self.port}",
+                "Connection: close",
+            ]
+            if self.cookies:
+                headers.append("Cookie: " + "; ".join(
+                    f"{k}={v}" for k, v in self.cookies.items()))
+            if method == "POST":
+                headers += [
+                    "Content-Type: application/x-www-form-urlencoded",
+                    f"Content-Length: {len(body)}",
+                    f"X-CSRFToken: {self.cookies.get('csrftoken', '')}",
+                ]
+            writer.write(("\r\n".join(headers) + "\r\n\r\n").encode()
+                          + (body if method == "POST" else b""))
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+        head, _, content = raw.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        chunked = False
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "set-cookie":
+                cookie, _, _ = value.partition(";")
+                key, _, val = cookie.partition("=")
+                self.cookies[key] = val
+            elif name == "transfer-encoding" and "chunked" in value:
+                chunked = True
+        return status, dechunk(content) if chunked else content
+
+
+def dechunk(content):
+    body = b""
+    while content:
+        size_line, _, content = content.partition(b"\r\n")
+        size = int(size_line.split(b";")[0], 16)
+        if not size:
+            break
+        body += content[:size]
+        content = content[size + 2:]
+    return body
+
+
+class VirtualUser:
+    def __init__(self, username, data, host, port, rng, stats):
+        self.username = username
+        self.session = Session(host, port)
+        self.data = data
+        self.own_tasks = list(data["own_tasks"].get(username, []))
+        self.rng = rng
+        self.stats = stats
+
+    async def call(self, endpoint, method, path, data=None, expect=(200,)):
+        started = time.perf_counter()
+        try:
+            status, _ = await self.session.request(method, path, data)
+        except OSError:
+            status = None
+        self.stats[endpoint].append(
+            (time.perf_counter() - started, status, status in expect))
+        return status
+
+    async def login(self):
+        await self.session.request("GET", "/login/")
+        await self.call("login", "POST", "/login/",
+                        {"username": self.username, "password": PASSWORD,
+                         "csrfmiddlewaretoken":
+                         self.session.cookies.get("csrftoken", "")},
+                        expect=(302,))
+        return "sessionid" in self.session.cookies
+
+    def task_form(self):
+        pick = self.rng.choice
+        labels = self.data["labels"]
+        return {
+            "name": f"Load test {self.rng.randrange(10 ** 6)}",
+            "description": "Created by the load test",
+            "status": pick(self.data["statuses"]),
+            "executor": pick(self.data["user_ids"]),
+            "labels": self.rng.sample(labels, min(len(labels), 2)),
+        }
+
+    async def list(self):
+        await self.call("list", "GET", "/tasks/")
+
+    async def filter(self):
+        choices = {
+            "status": self.data["statuses"],
+            "executor": self.data["user_ids"],
+            "label": self.data["labels"],
+        }
+        params = {name: self.rng.choice(ids) for name, ids in choices.items()
+                  if ids and self.rng.random() < 0.5}
+        if self.rng.random() < 0.3:
+            params["self_tasks"] = "on"
+        if self.rng.random() < 0.2:
+            params["q"] = self.rng.choice(["bug", "login", "report"])
+        await self.call("filter", "GET",
+                        "/tasks/?" + urllib.parse.urlencode(params))
+
+    async def detail(self):
+        task = self.rng.choice(self.data["tasks"])
+        await self.call("detail", "GET", f"/tasks/{task}/")
+
+    async def create(self):
+        await self.call("create", "POST", "/tasks/create/", self.task_form(),
+                        expect=(302,))
+
+    async def update(self):
+        task = self.rng.choice(self.data["tasks"])
+        await self.call("update", "POST", f"/tasks/{task}/update/",
+                        self.task_form(), expect=(302,))
+
+    async def delete(self):
+        if not self.own_tasks:
+            return await self.create()
+        task = self.own_tasks.pop()
+        await self.call("delete", "POST", f"/tasks/{task}/delete/",
+                        {"csrfmiddlewaretoken":
+                         self.session.cookies.get("csrftoken", "")},
+                        expect=(302,))
+
+    async def run(self, mix, deadline, think):
+        actions, weights = zip(*mix.items())
+        while time.monotonic() < deadline:
+            action = self.rng.choices(actions, weights)[0]
+            await getattr(self, action)()
+            if think:
+                await asyncio.sleep(self.rng.uniform(0, 2 * think))
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("list", "filter", "detail", "create", "update",
+                        "delete"):
+            sys.exit(f"Unknown action {name!r} in --mix")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def load(data, args, stats):
+    rng = random.Random(args.seed)
+    users = [VirtualUser(name, data, "127.0.0.1", args.port,
+                         random.Random(rng.random()), stats)
+             for name in data["users"]]
+    logged_in = await asyncio.gather(*(user.login() for user in users))
+    if not all(logged_in):
+        sys.exit(f"{logged_in.count(False)} virtual users could not log in")
+    started = time.monotonic()
+    deadline = started + args.duration
+    await asyncio.gather(*(user.run(args.mix, deadline, args.think_time)
+                           for user in users))
+    return time.monotonic() - started
+
+
+def report(stats, elapsed):
+    rows = {}
+    for endpoint, samples in sorted(stats.items()):
+        latencies = sorted(t for t, _, _ in samples)
+        errors = Counter(str(status) for _, status, ok in samples if not ok)
+        cuts = (statistics.quantiles(latencies, n=100, method="inclusive")
+                if len(latencies) > 1 else latencies * 99)
+        rows[endpoint] = {
+            "requests": len(samples),
+            "rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(cuts[49] * 1000, 1),
+            "p95_ms": round(cuts[94] * 1000, 1),
+            "p99_ms": round(cuts[98] * 1000, 1),
+            "error_rate": round(errors.total() / len(samples), 4),
+            "errors": dict(errors),
+        }
+    print(f"{'endpoint':<10} {'requests':>8} {'req/s':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for endpoint, r in rows.items():
+        line = (f"{endpoint:<10} {r['requests']:>8} {r['rps']:>8.1f} "
+                f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                f"{r['p99_ms']:>8.1f} {r['error_rate']:>7.1%}  "
+                + " ".join(f"{status}x{n}"
+                           for status, n in r["errors"].items()))
+        print(line.rstrip())
+    total = sum(r["requests"] for r in rows.values())
+    print(f"{'total':<10} {total:>8} {total / elapsed:>8.1f}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--database-url",
+                        help="Default: a new SQLite file in a temp dir.")
+    parser.add_argument("--seed-tasks", type=int, default=20000,
+                        help="Tasks to seed first; 0 uses existing "
+                             f"{PREFIX}* users and tasks.")
+    parser.add_argument("--users", type=int, default=20,
+                        help="Concurrent virtual users.")
+    parser.add_argument("--duration", type=float, default=30,
+                        help="Seconds of traffic.")
+    parser.add_argument("--mix", type=parse_mix,
+                        default=parse_mix(DEFAULT_MIX),
+                        help=f"Weighted actions (default {DEFAULT_MIX}).")
+    parser.add_argument("--think-time", type=float, default=0,
+                        help="Mean pause between a user's requests (s).")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results here.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = (args.database_url
+                        or f"sqlite:///{Path(tmp) / 'load.sqlite3'}")
+        if not args.database_url and not args.seed_tasks:
+            sys.exit("A fresh SQLite database needs --seed-tasks.")
+        env = server_env(database_url)
+        data = prepare(env, args)
+        process = start_server(env, args.port, args.workers, args.threads)
+        stats = defaultdict(list)
+        try:
+            elapsed = asyncio.run(load(data, args, stats))
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"{args.users} users, {args.workers} workers x {args.threads} "
+          f"threads, {elapsed:.1f}s")
+    rows = report(stats, elapsed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"users": args.users, "workers": args.workers,
+                       "threads": args.threads, "duration": elapsed,
+                       "mix": args.mix, "endpoints": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Read and write throughput of SQLite with and without SQLITE_TUNING.
+
+For each profile, seeds a new database file with ``manage.py
+seed_scale``, then runs reader and writer processes against it for
+``--duration`` seconds. Readers page through the task list. Writers
+alternate between creating a task and changing a task's status inside a
+transaction that reads before it writes, as the update view does. The
+script reports operations per second, p95 latency and ``database is
+locked`` errors.
+
+    uv run python benchmarks/sqlite_concurrency.py --readers 8 --writers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_worker(kind, duration, seed):
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "task_manager.settings")
+    import django
+
+    django.setup()
+    from django.db import OperationalError, transaction
+
+    from task_manager.statuses.models import Status
+    from task_manager.tasks.models import Task
+
+    rng = random.Random(seed)
+    status_ids = list(Status.objects.values_list("id", flat=True))
+    author_id, last_id = (Task.objects.order_by("-id")
+                          .values_list("author_id", "id").first())
+
+    def read():
+        start = rng.randrange(last_id)
+        list(Task.objects.select_related("status", "author", "executor")
+             .filter(id__gt=start).order_by("id")[:50])
+
+    def write(n):
+        with transaction.atomic():
+            if n % 2:
+                Task.objects.create(name="Concurrency test",
+                                    status_id=rng.choice(status_ids),
+                                    author_id=author_id)
+            else:
+                task = Task.objects.get(pk=rng.randrange(1, last_id))
+                task.status_id = rng.choice(status_ids)
+                task.save()
+
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            read() if kind == "read" else write(len(latencies) + errors)
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    print(json.dumps({"ops": len(latencies), "errors": errors,
+                      "latencies": latencies}))
+
+
+def run_profile(tuned, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SECRET_KEY="benchmark", DEBUG="False",
+                   SQLITE_TUNING=str(tuned),
+                   DATABASE_URL=f"sqlite:///{Path(tmp) / 'db.sqlite3'}")
+        for command in (["migrate"],
+                        ["seed_scale", "--tasks", str(args.tasks)]):
+            subprocess.run([sys.executable, "manage.py", *command], cwd=ROOT,
+                           env=env, check=True, stdout=subprocess.DEVNULL)
+        workers = [
+            (kind, subprocess.Popen(
+                [sys.executable, __file__, "--worker", kind,
+                 "--duration", str(args.duration), "--seed", str(i)],
+                cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True))
+            for i, kind in enumerate(["read"] * args.readers
+                                     + ["write"] * args.writers)
+        ]
+        totals = {}
+        for kind, process in workers:
+            result = json.loads(process.communicate()[0])
+            total = totals.setdefault(kind, {"ops": 0, "errors": 0,
+                                             "latencies": []})
+            for key in ("ops", "errors", "latencies"):
+                total[key] += result[key]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--worker", choices=["read", "write"],
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, default=0,
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return run_worker(args.worker, args.duration, args.seed)
+
+    print(f"{args.readers} readers, {args.writers} writers, "
+          f"{args.duration:.0f}s, {args.tasks} tasks")
+    print(f"{'profile':<8} {'kind':<6} {'ops/s':>8} {'p95 ms':>8} "
+          f"{'locked':>7}")
+    for tuned in (False, True):
+        for kind, total in sorted(run_profile(tuned, args).items()):
+            latencies = sorted(total["latencies"]) or [0.0]
+            p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+            print(f"{'tuned' if tuned else 'default':<8} {kind:<6} "
+                  f"{total['ops'] / args.duration:>8.1f} "
+                  f"{p95 * 1000:>8.1f} {total['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Request benchmarks, skipped unless pytest runs with ``--benchmark``.
+
+    pytest benchmarks --benchmark --benchmark-tasks 20000 \\
+        --benchmark-json results.json --benchmark-baseline baseline.json
+
+``manage.py benchmark`` runs the same scenarios from the command line.
+"""
+
+import json
+
+import pytest
+
+from task_manager import benchmark
+
+
+@pytest.fixture
+def options(request):
+    if not request.config.getoption("--benchmark"):
+        pytest.skip("needs --benchmark")
+    return {name: request.config.getoption(f"--benchmark-{name}")
+            for name in ("tasks", "iterations", "json", "baseline")}
+
+
+def test_hot_paths(db, options):
+    dataset = benchmark.seed(options["tasks"])
+    report = benchmark.run(dataset, options["iterations"],
+                           progress=lambda name, result: print(
+                               benchmark.format_row(name, result)))
+    if options["json"]:
+        with open(options["json"], "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if options["baseline"]:
+        with open(options["baseline"], encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = benchmark.compare(report, baseline)
+        assert not regressions, "\n".join(regressions)
@@ -0,0 +1,109 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import resolve
+
+from task_manager.instrumentation import QueryRecorder, get_query_budget
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks import counters
+from task_manager.tasks.models import Task
+
+
+def pytest_addoption(parser):
+    parser.addoption("--seed-size", type=int, default=50,
+                     help="Tasks created for the query budget tests.")
+    group = parser.getgroup("benchmark", "request benchmarks (benchmarks/)")
+    group.addoption("--benchmark", action="store_true",
+                    help="Run the request benchmarks.")
+    group.addoption("--benchmark-tasks", type=int, default=2000,
+                    help="Tasks seeded for the benchmarks.")
+    group.addoption("--benchmark-iterations", type=int, default=20)
+    group.addoption("--benchmark-json", help="Write the results here.")
+    group.addoption("--benchmark-baseline",
+                    help="Fail on regressions against this file.")
+
+
+@pytest.fixture
+def seeded(db, request):
+    """A logged-in client and ``--seed-size`` tasks with labels."""
+    size = request.config.getoption("--seed-size")
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(username=f"seed{i}", first_name=f"First{i}",
+             last_name=f"Last{i}") for i in range(5))
+    statuses = Status.objects.bulk_create(
+        Status(name=f"status {i}") for i in range(5))
+    labels = Label.objects.bulk_create(
+        Label(name=f"label {i}") for i in range(5))
+    tasks = Task.objects.bulk_create(
+        Task(name=f"Seeded task {i}", description="seeded",
+             status=statuses[i % 5], author=users[i % 5],
+             executor=users[(i + 1) % 5])
+        for i in range(size))
+    Task.labels.through.objects.bulk_create(
+        Task.labels.through(task_id=task.pk, label_id=label.pk)
+        for i, task in enumerate(tasks)
+        for label in labels[:i % 3 + 1])
+    counters.rebuild()
+    client = Client()
+    client.force_login(users[0])
+    return {"client": client, "user": users[0], "task": tasks[0],
+            "status": statuses[0], "label": labels[0],
+            "unused_status": Status.objects.create(name="unused"),
+            "unused_label": Label.objects.create(name="unused")}
+
+
+@pytest.fixture
+def assert_query_budget():
+    """Request ``url`` and fail if its view runs more queries than its
+    ``query_budget``."""
+
+    def check(client, url, method="get", data=None):
+        budget = get_query_budget(resolve(url.split("?")[0]).func)
+        assert budget is not None, f"{url} has no query budget"
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = getattr(client, method)(url, data)
+        assert response.status_code in (200, 302), response.status_code
+        assert recorder.count <= budget, (
+            f"{url} over its budget of {budget}: {recorder.summary()}\n"
+            + "\n".join(sql for sql, _, _ in recorder.queries))
+        return recorder
+
+    return check
+
+
+@pytest.fixture
+def rollbar_endpoint():
+    """A local stand-in for the Rollbar API: ``url`` goes in
+    ``ROLLBAR['endpoint']`` and ``items`` collects what was posted."""
+    items = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            items.append(json.loads(body))
+            reply = json.dumps({"err": 0, "result": {}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield SimpleNamespace(
+        url=f"http://127.0.0.1:{server.server_port}/api/1/", items=items)
+    server.shutdown()
+    server.server_close()
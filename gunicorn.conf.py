@@ -0,0 +1,21 @@
+# Read by gunicorn from the directory it starts in; options given on the
+# command line or in GUNICORN_CMD_ARGS still take precedence.
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+
+    if settings.WARM_UP:
+        from task_manager.warmup import warm_up
+
+        warm_up()
+
+
+def child_exit(server, worker):
+    # Runs in the master, which may not have loaded Django yet.
+    import os
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "task_manager.settings")
+    from task_manager.metrics import registry
+
+    registry.remove_process(worker.pid)
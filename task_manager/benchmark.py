@@ -0,0 +1,196 @@
+"""In-process benchmarks of the hot request paths.
+
+Requests go through the real URL conf and middleware with the Django test
+``Client``, against a dataset generated by ``seed_scale``. Each scenario
+reports p50/p95/p99 latency, queries per request and the peak memory
+allocated by one request. Results are saved as JSON and compared with a
+saved baseline: a scenario regresses when its p95 or peak memory grows
+past ``threshold`` times the baseline, or when it runs more queries.
+
+Run ``manage.py benchmark`` (on a throwaway test database) or
+``pytest benchmarks --benchmark``.
+"""
+
+import functools
+import io
+import itertools
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from task_manager.instrumentation import QueryRecorder
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+
+PREFIX = "bench"
+PASSWORD = "bench-password"
+
+
+def seed(tasks, users=None, labels=None, statuses=8, seed=0):
+    """Generate the dataset; the busiest author gets ``PASSWORD``."""
+    users = users or max(tasks // 100, 10)
+    labels = labels if labels is not None else max(tasks // 500, 10)
+    call_command("seed_scale", users=users, tasks=tasks, labels=labels,
+                 statuses=statuses, seed=seed, prefix=PREFIX,
+                 stdout=io.StringIO())
+    User = get_user_model()
+    author_id = most_used(Task.objects, "author_id")
+    user = (User.objects.get(pk=author_id) if author_id
+            else User.objects.filter(username__startswith=PREFIX).first())
+    user.set_password(PASSWORD)
+    user.save(update_fields=["password"])
+    return {"tasks": tasks, "users": users, "labels": labels,
+            "statuses": statuses, "seed": seed, "user": user}
+
+
+def most_used(queryset, field):
+    return (queryset.order_by().values_list(field, flat=True)
+            .annotate(n=Count("id")).order_by("-n", field).first())
+
+
+def scenarios(user):
+    """Return ``[(name, client, method, url, data)]`` for the hot paths."""
+    tasks = Task.objects.all()
+    task = tasks.filter(author=user).first() or tasks.first()
+    status_id = most_used(tasks, "status_id")
+    executor_id = most_used(tasks.exclude(executor=None), "executor_id")
+    label_id = most_used(Task.labels.through.objects, "label_id")
+    filters = {
+        "q": "billing",
+        "status": status_id,
+        "executor": executor_id,
+        "label": label_id,
+        "self_tasks": "on",
+    }
+    client = Client()
+    client.force_login(user)
+    found = []
+    index = reverse("tasks:index")
+    for size in range(len(filters) + 1):
+        for names in itertools.combinations(filters, size):
+            found.append((f"tasks:index[{','.join(names)}]", client, "get",
+                          index, {name: filters[name] for name in names}))
+    form = {
+        "name": "Benchmark task",
+        "description": "Created by the benchmark",
+        "status": status_id,
+        "executor": executor_id,
+        "labels": [label_id] if label_id else [],
+    }
+    if task is not None:
+        found += [
+            ("tasks:detail", client, "get",
+             reverse("tasks:detail", args=[task.pk]), None),
+            ("tasks:update", client, "post",
+             reverse("tasks:update", args=[task.pk]), form),
+        ]
+    found += [
+        ("tasks:create", client, "post", reverse("tasks:create"), form),
+        ("login", Client(), "post", reverse("login"),
+         {"username": user.username, "password": PASSWORD}),
+        ("statuses:index", client, "get", reverse("statuses:index"), None),
+        ("labels:index", client, "get", reverse("labels:index"), None),
+        ("users:list", client, "get", reverse("users:list"), None),
+    ]
+    return found
+
+
+def percentile(quantiles, p):
+    return round(quantiles[p - 1] * 1000, 3)
+
+
+def measure(client, method, url, data, iterations, warmup):
+    # secure: production settings redirect plain HTTP.
+    request = functools.partial(getattr(client, method), secure=True)
+    for _ in range(warmup):
+        request(url, data)
+    timings, queries = [], []
+    for _ in range(iterations):
+        recorder = QueryRecorder()
+        with recorder.record():
+            started = time.perf_counter()
+            response = request(url, data)
+            timings.append(time.perf_counter() - started)
+        if response.status_code not in (200, 302):
+            raise AssertionError(f"{method.upper()} {url} answered "
+                                 f"{response.status_code}")
+        queries.append(recorder.count)
+    # Tracing slows every allocation down, so memory gets its own request.
+    tracemalloc.start()
+    try:
+        request(url, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    quantiles = (statistics.quantiles(timings, n=100, method="inclusive")
+                 if len(timings) > 1 else timings * 99)
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(quantiles, 50),
+        "p95_ms": percentile(quantiles, 95),
+        "p99_ms": percentile(quantiles, 99),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "queries": max(queries),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run(dataset, iterations=20, warmup=2, only=None, progress=None):
+    results = {}
+    for name, client, method, url, data in scenarios(dataset["user"]):
+        if only and only not in name:
+            continue
+        results[name] = measure(client, method, url, data, iterations,
+                                warmup)
+        if progress:
+            progress(name, results[name])
+    return {
+        "meta": {
+            "time": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            **{key: value for key, value in dataset.items()
+               if key != "user"},
+            "counts": {
+                "tasks": Task.objects.count(),
+                "statuses": Status.objects.count(),
+                "labels": Label.objects.count(),
+            },
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=1.25):
+    """Return one line per scenario that got worse than ``baseline``."""
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        if result["queries"] > before["queries"]:
+            regressions.append(f"{name}: {before['queries']} -> "
+                               f"{result['queries']} queries")
+        for key in ("p95_ms", "peak_kib"):
+            if result[key] > before[key] * threshold:
+                regressions.append(f"{name}: {key} {before[key]} -> "
+                                   f"{result[key]}")
+    return regressions
+
+
+def format_row(name, result):
+    return (f"{name:<48} p50 {result['p50_ms']:8.2f}  "
+            f"p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms  "
+            f"{result['queries']:3d} queries  {result['peak_kib']:8.1f} KiB")
@@ -0,0 +1,80 @@
+"""Read replicas for GET traffic.
+
+``ReplicaMiddleware`` picks one of ``DATABASE_REPLICAS`` for a request
+to read from, but only for a safe-method request from a client that has
+not written recently. Writes, sessions, the reads of a write request,
+management commands and anything outside a request all use ``default``.
+After any unsafe request the client gets a cookie pinning it to the
+primary for ``REPLICA_PIN_SECONDS``, long enough for the replicas to
+catch up, so it reads its own writes.
+"""
+
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = "primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# A lagging replica must not log anybody out or back in.
+PRIMARY_APPS = {"sessions"}
+
+# The replica the current request reads from, if any.
+current_replica = contextvars.ContextVar("current_replica", default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = current_replica.get()
+        if replica and model._meta.app_label not in PRIMARY_APPS:
+            return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Not None: Django would then write where the instance was read.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def pinned_until(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        return 0.0
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        now = time.time()
+        safe = request.method in SAFE_METHODS
+        replica = None
+        if safe and pinned_until(request) <= now:
+            replica = random.choice(settings.DATABASE_REPLICAS)
+        token = current_replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_replica.reset(token)
+        if not safe:
+            pin = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, f"{now + pin:.0f}", max_age=int(pin) + 1,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True,
+                samesite="Lax")
+        return response
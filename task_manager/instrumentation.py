@@ -0,0 +1,109 @@
+"""Per-view SQL query instrumentation and query budgets.
+
+Views declare how many queries a request may run with a ``query_budget``
+class attribute (or the ``query_budget`` decorator for function views).
+``QueryBudgetMiddleware`` records every query of a request and logs the
+count, duplicates and total DB time, with a warning when the view went
+over its budget. The test suite checks the same budgets on seeded data.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that keeps the SQL, params and duration."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (sql, params, time.perf_counter() - started))
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, _, duration in self.queries)
+
+    @property
+    def duplicates(self):
+        """``{sql: n}`` for statements run more than once with the same
+        parameters."""
+        seen = Counter((sql, repr(params)) for sql, params, _ in self.queries)
+        return {sql: n for (sql, _), n in seen.items() if n > 1}
+
+    def summary(self):
+        lines = [f"{self.count} queries in {self.duration * 1000:.1f} ms"]
+        lines += [f"  {n}x {sql}" for sql, n in self.duplicates.items()]
+        return "\n".join(lines)
+
+
+def query_budget(limit):
+    """Set the query budget of a function-based view."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def get_query_budget(view):
+    """Budget of a view function as returned by ``resolve()``."""
+    return getattr(getattr(view, "view_class", view), "query_budget", None)
+
+
+def view_name(view):
+    view = getattr(view, "view_class", view)
+    return f"{view.__module__}.{view.__qualname__}"
+
+
+class QueryBudgetMiddleware:
+    """Log queries per view; enabled with ``settings.QUERY_BUDGET_LOG``."""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_LOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        view = getattr(request, "_query_budget_view", None)
+        if view is not None:
+            self.report(request, view, recorder)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget_view = view_func
+
+    def report(self, request, view, recorder):
+        budget = get_query_budget(view)
+        over = budget is not None and recorder.count > budget
+        logger.log(
+            logging.WARNING if over or recorder.duplicates else logging.INFO,
+            "%s %s %s: %s (budget %s)", request.method, request.path,
+            view_name(view), recorder.summary(), budget,
+        )
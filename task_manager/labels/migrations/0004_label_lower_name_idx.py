@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:45
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0003_alter_label_options_alter_label_created_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='label',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='label',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='label_lower_name_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:32
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0005_label_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='label',
+            name='label_lower_name_idx',
+        ),
+        migrations.AddIndex(
+            model_name='label',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='label_lower_name_id_idx'),
+        ),
+    ]
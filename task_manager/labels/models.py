@@ -1,12 +1,17 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class Label(models.Model):
     name = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['id']
+        indexes = [
+            models.Index(Lower('name'), 'id', name='label_lower_name_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
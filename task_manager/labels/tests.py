@@ -1,7 +1,10 @@
 import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
 from django.urls import reverse
 
 from task_manager.labels.models import Label
+from task_manager.labels.views import AsyncLabelListView
 from task_manager.tasks.models import Task, Status
 pytestmark = pytest.mark.django_db
 
@@ -71,3 +74,34 @@ def test_label_delete_when_unused_ok(client, django_user_model):
     resp = client.post(url)
     assert resp.status_code == 302
     assert not Label.objects.filter(pk=label.pk).exists()
+
+
+def test_async_labels_list(django_user_model):
+    user = django_user_model.objects.create_user(username="u", password="p")
+    Label.objects.create(name="bug")
+    request = RequestFactory().get(reverse("labels:index"))
+
+    async def auser():
+        return user
+
+    request.auser = auser
+    resp = async_to_sync(AsyncLabelListView.as_view())(request).render()
+    assert resp.status_code == 200
+    assert "bug" in resp.content.decode()
+
+
+@pytest.mark.parametrize("method, name, target, data", [
+    ("get", "labels:index", None, None),
+    ("get", "labels:create", None, None),
+    ("post", "labels:create", None, {"name": "fresh"}),
+    ("get", "labels:update", "label", None),
+    ("post", "labels:update", "label", {"name": "renamed"}),
+    ("get", "labels:delete", "label", None),
+    ("post", "labels:delete", "label", None),
+    ("post", "labels:delete", "unused_label", None),
+])
+def test_views_within_query_budget(seeded, assert_query_budget, method, name,
+                                   target, data):
+    args = [seeded[target].pk] if target else []
+    assert_query_budget(seeded["client"], reverse(name, args=args), method,
+                        data)
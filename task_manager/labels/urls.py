@@ -1,12 +1,17 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
+    AsyncLabelListView,
     LabelListView, LabelCreateView, LabelUpdateView, LabelDeleteView,
 )
 
 app_name = "labels"
 
+
+list_view = AsyncLabelListView if settings.ASYNC_VIEWS else LabelListView
+
 urlpatterns = [
-    path("", LabelListView.as_view(), name="index"),
+    path("", list_view.as_view(), name="index"),
     path("create/", LabelCreateView.as_view(), name="create"),
     path("<int:pk>/update/", LabelUpdateView.as_view(), name="update"),
     path("<int:pk>/delete/", LabelDeleteView.as_view(), name="delete"),
@@ -4,15 +4,29 @@ from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.shortcuts import redirect
 
+from task_manager.tasks.models import CollectionVersion
+from task_manager.tasks.versions import ConditionalGetMixin
+from task_manager.users.mixins import AsyncLoginRequiredMixin
+
 from .forms import LabelForm
 from .models import Label
 
 
-class LabelListView(LoginRequiredMixin, ListView):
+class LabelListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     model = Label
+    collections = [CollectionVersion.LABELS]
     template_name = "labels/index.html"
     context_object_name = "labels"
     login_url = "login"
+    query_budget = 4
+
+
+class AsyncLabelListView(AsyncLoginRequiredMixin, LabelListView):
+    async def get(self, request, *args, **kwargs):
+        self.object_list = [obj async for obj in
+                            self.get_queryset().aiterator()]
+        context = self.get_context_data()
+        return self.render_to_response(context)
 
 
 class LabelCreateView(LoginRequiredMixin, CreateView):
@@ -21,6 +35,7 @@ class LabelCreateView(LoginRequiredMixin, CreateView):
     template_name = "labels/form.html"
     success_url = reverse_lazy("labels:index")
     login_url = "login"
+    query_budget = 5
 
     def form_valid(self, form):
         messages.success(self.request, "Label created successfully")
@@ -33,6 +48,7 @@ class LabelUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "labels/form.html"
     success_url = reverse_lazy("labels:index")
     login_url = "login"
+    query_budget = 6
 
     def form_valid(self, form):
         messages.success(self.request, "Label updated successfully")
@@ -44,14 +60,14 @@ class LabelDeleteView(LoginRequiredMixin, DeleteView):
     template_name = "labels/confirm_delete.html"
     success_url = reverse_lazy("labels:index")
     login_url = "login"
+    query_budget = 8
 
-    def post(self, request, *args, **kwargs):
-        label = self.get_object()
-        if label.labeled_tasks.exists():
-            messages.error(request,
+    def form_valid(self, form):
+        if self.object.labeled_tasks.exists():
+            messages.error(self.request,
                            "Cannot delete label because it is in use")
             return redirect("labels:index")
 
-        response = super().post(request, *args, **kwargs)
-        messages.success(request, "Label deleted successfully")
+        response = super().form_valid(form)
+        messages.success(self.request, "Label deleted successfully")
         return response
@@ -0,0 +1,260 @@
+"""Prometheus metrics shared across worker processes.
+
+Each process keeps its counters and histograms in memory and, at most
+every ``METRICS_FLUSH_INTERVAL`` seconds, writes them to its own file in
+``METRICS_DIR``. ``/metrics`` sums the files of all workers and renders
+the Prometheus text format. When a worker exits, gunicorn's
+``child_exit`` hook (gunicorn.conf.py) folds its file into ``exited.json``,
+so counters never go backwards and the directory does not grow with every
+recycled worker. Empty ``METRICS_DIR`` when the server starts. Without
+``METRICS_DIR`` only the serving process is reported.
+
+Recording is a dict update under a lock; files are written on a later
+request, never per observation.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+EXITED = "exited.json"
+
+METRICS = {
+    "http_requests_total": (
+        COUNTER, "Requests by URL name, method and status code."),
+    "http_request_duration_seconds": (
+        HISTOGRAM, "Request latency by URL name and method."),
+    "db_queries_total": (COUNTER, "SQL statements run, by URL name."),
+    "db_query_duration_seconds_total": (
+        COUNTER, "Time spent in SQL, by URL name."),
+    "cache_requests_total": (
+        COUNTER, "Cache lookups by cache and result (hit or miss)."),
+    "error_reports_total": (
+        COUNTER, "Rollbar error reports by outcome (queued, sent, failed, "
+                 "deduplicated, sampled or dropped)."),
+}
+
+
+class Registry:
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.reset()
+
+    def reset(self):
+        self.path = None
+        if self.directory:
+            name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+            self.path = self.directory / name
+        self.lock = threading.Lock()
+        self.values = {}
+        self.flushed_at = time.monotonic()
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+        self.maybe_flush()
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, labels)
+        with self.lock:
+            data = self.values.get(key)
+            if data is None:
+                # Per-bucket counts (last one is +Inf), then sum.
+                data = self.values[key] = [0] * (len(buckets) + 1) + [0.0]
+            data[bisect_left(buckets, value)] += 1
+            data[-1] += value
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            return [[name, labels,
+                     list(value) if isinstance(value, list) else value]
+                    for (name, labels), value in self.values.items()]
+
+    def maybe_flush(self):
+        if (self.path is not None
+                and time.monotonic() - self.flushed_at >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        self.flushed_at = time.monotonic()
+        if self.path is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write(self.path, self.snapshot())
+
+    def collect(self):
+        """Merge the samples of every process into ``{(name, labels): v}``."""
+        if self.path is None:
+            return _merge([self.snapshot()])
+        self.flush()
+        samples = {}
+        for path in self.directory.glob("*.json"):
+            if path.name != EXITED:
+                samples[path.name] = _read(path)
+        # Read last: a worker file that was folded in while the others were
+        # read is listed in "files" and must not be counted twice.
+        exited = _read(self.directory / EXITED, {"files": [], "samples": []})
+        for name in exited["files"]:
+            samples.pop(name, None)
+        return _merge([*samples.values(), exited["samples"]])
+
+    def remove_process(self, pid):
+        """Fold the files of exited process ``pid`` into ``exited.json``."""
+        if self.directory is None:
+            return
+        paths = list(self.directory.glob(f"{pid}-*.json"))
+        if not paths:
+            return
+        exited = _read(self.directory / EXITED, {"files": [], "samples": []})
+        merged = _merge([exited["samples"], *map(_read, paths)])
+        _write(self.directory / EXITED, {
+            "files": [path.name for path in paths],
+            "samples": [[name, labels, value]
+                        for (name, labels), value in merged.items()],
+        })
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    def render(self):
+        merged = self.collect()
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            series = sorted((labels, value) for (metric, labels), value
+                            in merged.items() if metric == name)
+            if not series:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for labels, value in series:
+                if kind == HISTOGRAM:
+                    lines += _histogram_lines(name, labels, value)
+                else:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _read(path, default=()):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return default  # replaced or removed while reading
+
+
+def _write(path, data):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def _merge(samples):
+    merged = {}
+    for sample in samples:
+        for name, labels, value in sample:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if isinstance(value, list):
+                total = merged.setdefault(key, [0] * len(value))
+                for i, n in enumerate(value):
+                    total[i] += n
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def _escape(value):
+    return (str(value).replace("\\", r"\\").replace('"', r'\"')
+            .replace("\n", r"\n"))
+
+
+def _labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"'
+                          for key, value in pairs) + "}"
+
+
+def _histogram_lines(name, labels, value):
+    *counts, total = value
+    lines, cumulative = [], 0
+    bounds = [*LATENCY_BUCKETS, "+Inf"]
+    for bound, n in zip(bounds, counts):
+        cumulative += n
+        lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(labels)} {total}")
+    lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return lines
+
+
+registry = Registry(getattr(settings, "METRICS_DIR", None),
+                    getattr(settings, "METRICS_FLUSH_INTERVAL", 5.0))
+# A worker forked from a preloaded master starts from zero in a file of its
+# own.
+os.register_at_fork(after_in_child=registry.reset)
+
+
+def record_cache(cache, hit):
+    registry.inc("cache_requests_total",
+                 (("cache", cache), ("result", "hit" if hit else "miss")))
+
+
+def record_error_report(outcome, count=1):
+    registry.inc("error_reports_total", (("outcome", outcome),), count)
+
+
+class QueryCounter:
+    """``execute_wrapper`` that only counts statements and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Record latency, status and SQL per URL name; see ``METRICS_ENABLED``."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        queries = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else "<unresolved>"
+        labels = (("view", view), ("method", request.method))
+        registry.observe("http_request_duration_seconds", labels,
+                         time.perf_counter() - started)
+        registry.inc("http_requests_total",
+                     labels + (("status", str(response.status_code)),))
+        registry.inc("db_queries_total", (("view", view),), queries.count)
+        registry.inc("db_query_duration_seconds_total", (("view", view),),
+                     queries.duration)
+        return response
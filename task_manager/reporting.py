@@ -0,0 +1,279 @@
+"""Rollbar error reporting off the request path.
+
+``RollbarMiddleware`` takes the place of Rollbar's own
+``RollbarNotifierMiddleware``. A failing request only fingerprints its
+exception, copies what the report needs from the request (URL, headers,
+parameters and user id) into plain data and puts that on a bounded
+``ReportQueue``; one background thread per process builds the Rollbar
+payloads and posts them, a batch every ``ROLLBAR_FLUSH_INTERVAL`` seconds
+over one keep-alive connection.
+When errors spike, for example while the database is down, requests do
+not wait for Rollbar and the reports are thinned out instead:
+
+- an exception whose fingerprint (type and traceback lines) was queued
+  in the last ``ROLLBAR_DEDUPE_SECONDS`` is only counted, and the count
+  goes with the next report of it;
+- past half full, the queue admits a report with a probability falling
+  linearly to zero;
+- when full, reports are dropped.
+
+``error_reports_total`` in ``/metrics`` counts reports by outcome.
+
+``rollbar`` pulls in ``requests``, ``urllib3``, ``ssl`` and friends,
+about a seventh of a worker's import time, so it is only imported by
+the background thread when it sends its first batch, and never when
+``ROLLBAR['access_token']`` is unset. Point ``ROLLBAR_ENDPOINT`` at a
+local stand-in (see the ``rollbar_endpoint`` fixture) to try it.
+"""
+
+import atexit
+import copy
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import traceback
+from contextlib import suppress
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404
+
+from .metrics import record_error_report
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(exception):
+    frames = []
+    tb = exception.__traceback__
+    while tb is not None:
+        frames.append((tb.tb_frame.f_code.co_filename, tb.tb_lineno))
+        tb = tb.tb_next
+    return hash((type(exception).__module__, type(exception).__qualname__,
+                 tuple(frames)))
+
+
+def summarize(exception):
+    """Copy ``exception`` and its causes, leaving their frames behind.
+
+    Returns the copy, which Rollbar's level filters and message need, and
+    ``(class name, message, frames)`` for each exception of the chain.
+    The frames are a ``StackSummary``: file, line and function, with no
+    locals, and the source line read only when it is sent.
+    """
+    chain, seen, clones = [], set(), []
+    while exception is not None and id(exception) not in seen:
+        seen.add(id(exception))
+        try:
+            clone = copy.copy(exception)
+        except Exception:
+            clone = Exception(str(exception))
+        chain.append((type(exception).__name__, str(exception),
+                      traceback.StackSummary.extract(
+                          traceback.walk_tb(exception.__traceback__),
+                          lookup_lines=False)))
+        clones.append(clone)
+        exception = exception.__cause__ or exception.__context__
+    for clone, cause in zip(clones, clones[1:] + [None]):
+        clone.__traceback__ = None
+        clone.__cause__ = cause
+        clone.__context__ = None
+    return clones[0], chain
+
+
+def filter_ip(ip, capture_ip=True):
+    """Apply Rollbar's ``capture_ip`` setting (True, False or "anonymize")."""
+    if capture_ip is True or not ip:
+        return ip
+    if capture_ip != "anonymize":
+        return None
+    if "." in ip:
+        return ".".join(ip.split(".")[:3]) + ".0"
+    parts = ip.split(":")
+    return ":".join(parts[:3] + ["0000"] * 5) if len(parts) > 2 else None
+
+
+def request_data(request, capture_ip=True):
+    """What Rollbar's Django integration reports about ``request``."""
+    post = request.POST.copy()
+    sensitive = getattr(request, "sensitive_post_parameters", [])
+    for param in list(post) if sensitive == "__ALL__" else sensitive:
+        if param in post:
+            post[param] = "******"
+    meta = request.META
+    return {
+        "url": request.build_absolute_uri(),
+        "method": request.method,
+        "GET": dict(request.GET),
+        "POST": dict(post),
+        "user_ip": filter_ip(meta.get("HTTP_X_FORWARDED_FOR")
+                             or meta.get("HTTP_X_REAL_IP")
+                             or meta.get("REMOTE_ADDR"), capture_ip),
+        "headers": {key[5:].replace("_", "-").title(): value
+                    for key, value in meta.items()
+                    if key.startswith("HTTP_")},
+    }
+
+
+class ReportQueue:
+    """Bounded queue of reports that ``send`` receives in batches."""
+
+    def __init__(self, send, size=1000, batch_size=20, interval=1.0,
+                 dedupe_seconds=60.0):
+        self.send = send
+        self.size = size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dedupe_seconds = dedupe_seconds
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def start(self):
+        # Threads do not survive a fork: a worker forked from a
+        # preloaded master starts its own, with an empty queue.
+        self.queue = queue.Queue(self.size)
+        self.recent = {}  # fingerprint: [queued at, duplicates since]
+        self.pid = os.getpid()
+        threading.Thread(target=self.run, name="rollbar-reports",
+                         daemon=True).start()
+        atexit.register(self.flush, timeout=2.0)
+
+    def put(self, key, report):
+        """Queue ``report`` unless it is a duplicate or sampled out."""
+        with self.lock:
+            if self.pid != os.getpid():
+                self.start()
+            now = time.monotonic()
+            seen = self.recent.get(key)
+            if seen and now - seen[0] < self.dedupe_seconds:
+                seen[1] += 1
+                outcome = "deduplicated"
+            else:
+                outcome = self.admit(key, report, seen[1] if seen else 0, now)
+        record_error_report(outcome)
+        return outcome == "queued"
+
+    def admit(self, key, report, duplicates, now):
+        free, half = self.size - self.queue.qsize(), self.size / 2
+        if free <= 0:
+            return "dropped"
+        if free < half and random.random() >= free / half:
+            return "sampled"
+        try:
+            self.queue.put_nowait((report, duplicates))
+        except queue.Full:
+            return "dropped"
+        if len(self.recent) >= self.size:
+            self.recent = {k: v for k, v in self.recent.items()
+                           if now - v[0] < self.dedupe_seconds}
+        self.recent[key] = [now, 0]
+        return "queued"
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Let a burst collect into one batch.
+            time.sleep(self.interval)
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.send(batch)
+            except Exception:
+                logger.exception("Sending %d error reports failed",
+                                 len(batch))
+                record_error_report("failed", len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait up to ``timeout`` seconds for the queue to be sent."""
+        if self.pid != os.getpid():
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = (None if deadline is None
+                             else deadline - time.monotonic())
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+
+class RollbarMiddleware:
+    def __init__(self, get_response):
+        config = getattr(settings, "ROLLBAR", {})
+        if not config.get("access_token") or not config.get("enabled", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.ignorable_404_urls = config.get("ignorable_404_urls", ())
+        self.capture_ip = config.get("capture_ip", True)
+        self.initialized = False
+        self.reports = ReportQueue(
+            self.send, size=settings.ROLLBAR_QUEUE_SIZE,
+            batch_size=settings.ROLLBAR_BATCH_SIZE,
+            interval=settings.ROLLBAR_FLUSH_INTERVAL,
+            dedupe_seconds=settings.ROLLBAR_DEDUPE_SECONDS)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, Http404) and any(
+                pattern.search(request.get_full_path())
+                for pattern in self.ignorable_404_urls):
+            return
+        # Copy what the report needs now, as plain data: the body cannot be
+        # read once the response has gone out, request.user must not be
+        # loaded from the background thread, which has no managed database
+        # connection, and the exception's frames stay untouched for
+        # Django's own handlers.
+        payload = {"framework": "django"}
+        with suppress(Exception):
+            payload["request"] = request_data(request, self.capture_ip)
+        with suppress(Exception):
+            if request.user.is_authenticated:
+                payload["person"] = {"id": str(request.user.pk)}
+        if request.resolver_match and request.resolver_match.url_name:
+            payload["context"] = request.resolver_match.url_name
+        self.reports.put(fingerprint(exception),
+                         (*summarize(exception), payload))
+
+    def initialize(self):
+        import rollbar
+
+        if not self.initialized:
+            config = {"exception_level_filters": [(Http404, "warning")],
+                      **settings.ROLLBAR}
+            # Already on a background thread: post from it, reusing its
+            # connection, instead of starting a thread per report.
+            rollbar.init(**{**config, "handler": "blocking"})
+            self.initialized = True
+
+    def send(self, batch):
+        import rollbar
+
+        self.initialize()
+        for (exception, chain, payload), duplicates in batch:
+            traces = [{
+                "frames": [{"filename": frame.filename,
+                            "lineno": frame.lineno, "method": frame.name,
+                            "code": frame.line} for frame in frames],
+                "exception": {"class": name, "message": message},
+            } for name, message, frames in chain]
+            # Same shape as Rollbar builds from a live traceback.
+            body = ({"trace": traces[0]} if len(traces) == 1
+                    else {"trace_chain": traces})
+            uuid = rollbar.report_exc_info(
+                (type(exception), exception, None), extra_data={
+                    "duplicates_since_last_report": duplicates,
+                } if duplicates else None,
+                payload_data={**payload, "body": body})
+            record_error_report("sent" if uuid else "failed")
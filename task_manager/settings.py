@@ -12,12 +12,15 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-from dotenv import load_dotenv
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / '.env')
+# Deployments set real environment variables; only import python-dotenv
+# when there is a .env to read.
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
 
 
 # Quick-start development settings - unsuitable for production
@@ -40,6 +43,17 @@ ROLLBAR = {
     'code_version': os.getenv('CODE_VERSION', '1.0'),
     'root': str(BASE_DIR),
 }
+if os.getenv('ROLLBAR_ENDPOINT'):
+    ROLLBAR['endpoint'] = os.getenv('ROLLBAR_ENDPOINT')
+
+# Errors are reported from a background thread (task_manager/reporting.py):
+# a batch of up to ROLLBAR_BATCH_SIZE every ROLLBAR_FLUSH_INTERVAL seconds,
+# at most ROLLBAR_QUEUE_SIZE waiting, and repeats of an exception within
+# ROLLBAR_DEDUPE_SECONDS only counted.
+ROLLBAR_QUEUE_SIZE = int(os.getenv('ROLLBAR_QUEUE_SIZE', '1000'))
+ROLLBAR_BATCH_SIZE = int(os.getenv('ROLLBAR_BATCH_SIZE', '20'))
+ROLLBAR_FLUSH_INTERVAL = float(os.getenv('ROLLBAR_FLUSH_INTERVAL', '1'))
+ROLLBAR_DEDUPE_SECONDS = float(os.getenv('ROLLBAR_DEDUPE_SECONDS', '60'))
 
 # Application definition
 
@@ -58,14 +72,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'task_manager.metrics.MetricsMiddleware',
+    'task_manager.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'rollbar.contrib.django.middleware.RollbarNotifierMiddleware',
+    'task_manager.instrumentation.QueryBudgetMiddleware',
+    'task_manager.reporting.RollbarMiddleware',
+    'task_manager.db_router.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'task_manager.slowlog.SlowQueryMiddleware',
+    'task_manager.timing.ServerTimingViewMiddleware',
 ]
 
 STATIC_URL = '/static/'
@@ -89,6 +109,35 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'task_manager.wsgi.application'
 
+# Serve the read-heavy list and detail pages with native async views.
+# Only worth enabling under an ASGI server (uvicorn/daphne).
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# Log query count, duplicates and DB time per view, warning when a view
+# exceeds its query_budget.
+QUERY_BUDGET_LOG = os.getenv('QUERY_BUDGET_LOG', str(DEBUG)) == 'True'
+
+# Add a Server-Timing header and a log line splitting each request into
+# middleware, view, template and DB time.
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+
+# Prometheus metrics at /metrics. With several worker processes point
+# METRICS_DIR at a directory they share, emptied before the server starts.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Have each gunicorn worker load URLs, templates, forms, translations and
+# its database connection before its first request (task_manager/warmup.py).
+WARM_UP = os.getenv('WARM_UP', 'True') == 'True'
+
+# Log statements slower than SLOW_QUERY_MS, with their EXPLAIN, to the
+# JSON lines file SLOW_QUERY_LOG; summarize with 'manage.py slow_queries'.
+SLOW_QUERY_MS = (float(os.environ['SLOW_QUERY_MS'])
+                 if os.getenv('SLOW_QUERY_MS') else None)
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG') or None
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -101,6 +150,63 @@ DATABASES = {
     )
 }
 
+# Read replicas, as comma-separated DATABASE_REPLICA_URLS. GET requests
+# read from them; a client that sent any other request reads from the
+# primary for REPLICA_PIN_SECONDS. 'manage.py sync_replicas' copies a
+# SQLite primary into SQLite replicas to try this locally.
+DATABASE_REPLICAS = []
+for number, url in enumerate(
+        filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **dj_database_url.parse(
+            url,
+            conn_max_age=600,
+            ssl_require=os.getenv('DB_SSL_REQUIRE', 'False') == 'True'
+        ),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['task_manager.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = float(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
+# Let several workers share a SQLite file: WAL, synchronous=NORMAL, mmap,
+# a bigger page cache and busy_timeout (task_manager/sqlite.py), and
+# BEGIN IMMEDIATE transactions. WAL needs a local filesystem.
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'True') == 'True'
+if SQLITE_TUNING:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.sqlite3':
+            database.setdefault('OPTIONS', {})['transaction_mode'] = (
+                'IMMEDIATE')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND is a dotted backend path and CACHE_LOCATION its address,
+# e.g. django.core.cache.backends.redis.RedisCache and redis://host:6379/0.
+# For a single host, task_manager.shared_cache.SharedMemoryCache with a
+# file such as /dev/shm/task_manager.cache is shared by all workers
+# without a cache server. The default memory cache is private to each
+# process.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND',
+                             'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Read sessions (written through to the database) and the logged-in user
+# from the cache, saving two queries per page view. Needs a cache shared by
+# all workers; switching it on logs everybody out once.
+CACHED_AUTH = os.getenv('CACHED_AUTH') == 'True'
+if CACHED_AUTH:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = [
+        'task_manager.users.backends.CachedModelBackend',
+    ]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,283 @@
+"""Cache backend in a memory-mapped file shared by all workers on a host.
+
+    CACHES = {"default": {
+        "BACKEND": "task_manager.shared_cache.SharedMemoryCache",
+        "LOCATION": "/dev/shm/task_manager.cache",
+        "OPTIONS": {"SIZE": 64 * 1024 * 1024},
+    }}
+
+The file holds a few size classes of fixed-size slots (512 B to 256 KiB).
+An entry goes to the smallest class it fits; values larger than the
+biggest slot are not cached. Within a class a key can only live in one
+set of ``WAYS`` slots picked by its hash, and a full set evicts its least
+recently used entry, as a CPU cache does. Expired entries are dropped
+when read or overwritten.
+
+Every operation holds an ``flock`` on the file, so ``add`` and ``incr``
+are atomic across processes. The first process to open the file lays it
+out; one configured with a different size replaces the file with a new
+one, and processes still mapping the old file keep using it until they
+restart.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+MAGIC = b"TMCACHE1"
+HEADER = struct.Struct("<8sQ32s")
+WAYS = 8
+# Per way: key hash, expiry (0 = never), last use, entry length (0 = free).
+WAY = struct.Struct("<QdQI4x")
+SET = struct.Struct("<" + WAY.format[1:] * WAYS)
+ENTRY = struct.Struct("<I")  # key length, then key and pickled value
+SLOT_SIZES = (512, 4096, 32768, 262144)
+DEFAULT_SIZE = 64 * 1024 * 1024
+
+
+class SizeClass:
+    def __init__(self, offset, slot_size, sets):
+        self.slot_size = slot_size
+        self.sets = sets
+        self.headers = offset
+        self.slots = offset + sets * SET.size
+
+    @property
+    def end(self):
+        return self.slots + self.sets * WAYS * self.slot_size
+
+    def header(self, index, way):
+        return self.headers + index * SET.size + way * WAY.size
+
+    def slot(self, index, way):
+        return self.slots + (index * WAYS + way) * self.slot_size
+
+
+def layout(size, slot_sizes):
+    """Split ``size`` bytes evenly between the size classes."""
+    share = (size - HEADER.size) // len(slot_sizes)
+    offset, classes = HEADER.size, []
+    for slot_size in slot_sizes:
+        sets = max(1, share // (SET.size + WAYS * slot_size))
+        classes.append(SizeClass(offset, slot_size, sets))
+        offset = classes[-1].end
+    return classes, offset
+
+
+def key_hash(key):
+    # hash() is salted per process; the file is shared between processes.
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(),
+                          "little")
+
+
+class SharedMemoryCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = location
+        slot_sizes = tuple(options.get("SLOT_SIZES", SLOT_SIZES))
+        self._classes, self._size = layout(
+            options.get("SIZE", DEFAULT_SIZE), slot_sizes)
+        self._signature = hashlib.sha256(
+            repr((self._size, WAYS, slot_sizes)).encode()).digest()
+        self._max_entry = slot_sizes[-1]
+        self._thread_lock = threading.Lock()
+        self._pid = None
+
+    def _open(self):
+        # A forked child must not share the parent's open file: flock
+        # belongs to the open file, so the two would not exclude each other.
+        while True:
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                if self._ready(fd):
+                    self._map = mmap.mmap(fd, self._size)
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    break
+            except BaseException:
+                os.close(fd)
+                raise
+            os.close(fd)
+        self._fd, self._pid = fd, os.getpid()
+
+    def _ready(self, fd):
+        """Lay out an empty file; ``False`` if ``fd`` must be reopened."""
+        try:
+            if os.stat(self._path).st_ino != os.fstat(fd).st_ino:
+                return False  # replaced while we waited for the lock
+        except FileNotFoundError:
+            return False
+        header = HEADER.pack(MAGIC, self._size, self._signature)
+        if os.fstat(fd).st_size == 0:
+            os.ftruncate(fd, self._size)
+            os.pwrite(fd, header, 0)
+            return True
+        if os.pread(fd, HEADER.size, 0) == header:
+            return True
+        # Laid out for another size: truncating would crash processes
+        # mapping it, so swap in a new file instead.
+        tmp = f"{self._path}.{os.getpid()}.tmp"
+        tmp_fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(tmp_fd, self._size)
+            os.pwrite(tmp_fd, header, 0)
+        finally:
+            os.close(tmp_fd)
+        os.replace(tmp, self._path)
+        return False
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            if self._pid != os.getpid():
+                self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield self._map
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _find(self, mm, key, h, now):
+        """Return ``(size class, set, way, length)`` holding ``key``."""
+        for cls in self._classes:
+            index = h % cls.sets
+            ways = SET.unpack_from(mm, cls.header(index, 0))
+            for way in range(WAYS):
+                hash_, expires, _, length = ways[way * 4:way * 4 + 4]
+                if not length or hash_ != h:
+                    continue
+                start = cls.slot(index, way)
+                (key_length,) = ENTRY.unpack_from(mm, start)
+                stored = mm[start + ENTRY.size:start + ENTRY.size + key_length]
+                if stored != key:
+                    continue
+                if expires and expires <= now:
+                    self._free(mm, cls, index, way)
+                    return None
+                return cls, index, way, length
+        return None
+
+    def _free(self, mm, cls, index, way):
+        WAY.pack_into(mm, cls.header(index, way), 0, 0.0, 0, 0)
+
+    def _read(self, mm, found, key):
+        cls, index, way, length = found
+        start = cls.slot(index, way) + ENTRY.size + len(key)
+        end = cls.slot(index, way) + length
+        hash_, expires, _, _ = WAY.unpack_from(mm, cls.header(index, way))
+        WAY.pack_into(mm, cls.header(index, way), hash_, expires,
+                      time.monotonic_ns(), length)
+        return pickle.loads(mm[start:end])
+
+    def _write(self, mm, key, h, value, expires, now):
+        entry = (ENTRY.pack(len(key)) + key
+                 + pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        found = self._find(mm, key, h, now)
+        if found is not None:
+            self._free(mm, *found[:3])
+        if len(entry) > self._max_entry:
+            return False
+        cls = next(c for c in self._classes if len(entry) <= c.slot_size)
+        index = h % cls.sets
+        ways = SET.unpack_from(mm, cls.header(index, 0))
+
+        def age(way):
+            _, way_expires, used, length = ways[way * 4:way * 4 + 4]
+            if not length or (way_expires and way_expires <= now):
+                return -1  # free or expired: reuse first
+            return used
+
+        way = min(range(WAYS), key=age)
+        start = cls.slot(index, way)
+        mm[start:start + len(entry)] = entry
+        WAY.pack_into(mm, cls.header(index, way), h, expires or 0.0,
+                      time.monotonic_ns(), len(entry))
+        return True
+
+    def _key(self, key, version):
+        key = self.make_and_validate_key(key, version=version)
+        return key.encode(), key_hash(key.encode())
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key, h = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        with self._locked() as mm:
+            now = time.time()
+            if self._find(mm, key, h, now) is not None:
+                return False
+            if expires is not None and expires <= now:
+                return True
+            return self._write(mm, key, h, value, expires, now)
+
+    def get(self, key, default=None, version=None):
+        key, h = self._key(key, version)
+        with self._locked() as mm:
+            found = self._find(mm, key, h, time.time())
+            if found is None:
+                return default
+            return self._read(mm, found, key)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key, h = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        with self._locked() as mm:
+            now = time.time()
+            if expires is not None and expires <= now:
+                found = self._find(mm, key, h, now)
+                if found is not None:
+                    self._free(mm, *found[:3])
+                return
+            self._write(mm, key, h, value, expires, now)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key, h = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        with self._locked() as mm:
+            found = self._find(mm, key, h, time.time())
+            if found is None:
+                return False
+            cls, index, way, length = found
+            WAY.pack_into(mm, cls.header(index, way), h, expires or 0.0,
+                          time.monotonic_ns(), length)
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key, h = self._key(key, version)
+        with self._locked() as mm:
+            now = time.time()
+            found = self._find(mm, key, h, now)
+            if found is None:
+                raise ValueError(f"Key '{key.decode()}' not found.")
+            value = self._read(mm, found, key) + delta
+            cls, index, way, _ = found
+            _, expires, _, _ = WAY.unpack_from(mm, cls.header(index, way))
+            self._write(mm, key, h, value, expires, now)
+            return value
+
+    def has_key(self, key, version=None):
+        key, h = self._key(key, version)
+        with self._locked() as mm:
+            return self._find(mm, key, h, time.time()) is not None
+
+    def delete(self, key, version=None):
+        key, h = self._key(key, version)
+        with self._locked() as mm:
+            found = self._find(mm, key, h, time.time())
+            if found is None:
+                return False
+            self._free(mm, *found[:3])
+            return True
+
+    def clear(self):
+        with self._locked() as mm:
+            for cls in self._classes:
+                mm[cls.headers:cls.slots] = bytes(cls.slots - cls.headers)
@@ -0,0 +1,147 @@
+"""Slow-query log with the query plan captured alongside.
+
+Every database connection gets ``SlowQueryLogger`` as its first execute
+wrapper. A statement slower than ``settings.SLOW_QUERY_MS`` is appended
+as a JSON line to ``settings.SLOW_QUERY_LOG`` (and logged as a warning)
+with its fingerprint, the URL name, view and filter parameters of the
+request that ran it, and an ``EXPLAIN`` of the statement. Aggregate the
+file with ``manage.py slow_queries``.
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# (url name, view, method, path, filter names) of the running request.
+current_request = contextvars.ContextVar("slowlog_request", default=None)
+_explaining = threading.local()
+_write_lock = threading.Lock()
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Return ``(hash, normalized)``: literals and ``IN`` lists of any
+    length collapse, so one query shape gets one fingerprint."""
+    normalized = _LITERAL.sub("?", sql)
+    normalized = _IN_LIST.sub("(...)", normalized)
+    normalized = _SPACE.sub(" ", normalized).strip()
+    digest = hashlib.sha1(normalized.encode(), usedforsecurity=False)
+    return digest.hexdigest()[:16], normalized
+
+
+def explain(connection, sql, params):
+    vendor = connection.vendor
+    if vendor == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif vendor == "postgresql":
+        prefix = "EXPLAIN (FORMAT JSON) "
+    else:
+        return None
+    # Inside a transaction, a failing EXPLAIN would abort the caller's
+    # transaction on PostgreSQL unless it runs in a savepoint.
+    guard = (transaction.atomic(using=connection.alias, savepoint=True)
+             if connection.in_atomic_block else nullcontext())
+    _explaining.active = True
+    try:
+        with guard, connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+    finally:
+        _explaining.active = False
+    if vendor == "postgresql":
+        return rows[0][0]
+    return [row[-1] for row in rows]
+
+
+class SlowQueryLogger:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        threshold = settings.SLOW_QUERY_MS
+        if threshold is None or getattr(_explaining, "active", False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= threshold:
+            self.record(sql, params, many, duration)
+        return result
+
+    def record(self, sql, params, many, duration):
+        digest, normalized = fingerprint(sql)
+        url_name, view, method, path, filters = (
+            current_request.get() or (None, None, None, None, []))
+        plan = None
+        if not many and normalized.lstrip("( ").upper().startswith(
+                ("SELECT", "WITH")):
+            plan = explain(self.connection, sql, params)
+        entry = {
+            "time": timezone.now().isoformat(),
+            "duration_ms": round(duration, 3),
+            "fingerprint": digest,
+            "sql": normalized,
+            "database": self.connection.alias,
+            "url_name": url_name,
+            "view": view,
+            "method": method,
+            "path": path,
+            "filters": filters,
+            "plan": plan,
+        }
+        logger.warning("Slow query (%.1f ms) %s in %s: %s", duration,
+                       digest, url_name or "-", normalized[:200])
+        if settings.SLOW_QUERY_LOG:
+            line = json.dumps(entry, default=str) + "\n"
+            with _write_lock, open(settings.SLOW_QUERY_LOG, "a",
+                                   encoding="utf-8") as log:
+                log.write(line)
+
+
+def install(sender, connection, **kwargs):
+    """``connection_created`` receiver."""
+    if not any(isinstance(wrapper, SlowQueryLogger)
+               for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.insert(0, SlowQueryLogger(connection))
+
+
+class SlowQueryMiddleware:
+    """Tag slow queries with the URL name, view and filters of a request."""
+
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_request.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, "view_class", view_func)
+        filters = sorted(key for key, values in request.GET.lists()
+                         if any(values))
+        current_request.set((
+            request.resolver_match.view_name, view.__qualname__,
+            request.method, request.path, filters,
+        ))
@@ -0,0 +1,29 @@
+"""SQLite tuning for several worker processes sharing one database file.
+
+With ``SQLITE_TUNING`` every new SQLite connection switches to WAL, so
+readers no longer block on a writer, and waits up to ``busy_timeout`` for
+the write lock instead of failing with ``database is locked``. Settings
+also open transactions with ``BEGIN IMMEDIATE``: a deferred transaction
+that reads before it writes cannot wait for the lock, because waiting
+could deadlock, and fails at once.
+"""
+
+from django.conf import settings
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    # In WAL mode a crash can lose the last commits, not corrupt the file.
+    "synchronous": "NORMAL",
+    "busy_timeout": 10000,  # ms
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -16384,  # KiB, per connection
+}
+
+
+def configure(sender, connection, **kwargs):
+    """``connection_created`` receiver."""
+    if connection.vendor != "sqlite" or not settings.SQLITE_TUNING:
+        return
+    # On the raw connection, so the pragmas are not logged as queries.
+    for name, value in PRAGMAS.items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
@@ -1,7 +1,9 @@
+from asgiref.sync import async_to_sync
 from django.db.models import ProtectedError
-from django.test import Client
+from django.test import Client, RequestFactory
 
 from task_manager.statuses.models import Status
+from task_manager.statuses.views import AsyncStatusListView
 from task_manager.tasks.models import Task
 import pytest
 from django.contrib.auth import get_user_model
@@ -86,3 +88,47 @@ def test_cannot_delete_status_in_use(django_user_model):
 
     with pytest.raises(ProtectedError):
         status.delete()
+
+
+def test_async_list(user):
+    Status.objects.create(name="new")
+    request = RequestFactory().get(reverse("statuses:index"))
+
+    async def auser():
+        return user
+
+    request.auser = auser
+    resp = async_to_sync(AsyncStatusListView.as_view())(request).render()
+    assert resp.status_code == 200
+    assert "new" in resp.content.decode()
+
+
+def test_list_not_modified(auth_client):
+    Status.objects.create(name="new")
+    url = reverse("statuses:index")
+    auth_client.get(url)
+    first = auth_client.get(url)
+    r = auth_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert r.status_code == 304
+    r = auth_client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert r.status_code == 304
+    Status.objects.create(name="done")
+    r = auth_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert r.status_code == 200
+
+
+@pytest.mark.parametrize("method, name, target, data", [
+    ("get", "statuses:index", None, None),
+    ("get", "statuses:create", None, None),
+    ("post", "statuses:create", None, {"name": "fresh"}),
+    ("get", "statuses:update", "status", None),
+    ("post", "statuses:update", "status", {"name": "renamed"}),
+    ("get", "statuses:delete", "status", None),
+    ("post", "statuses:delete", "status", None),
+    ("post", "statuses:delete", "unused_status", None),
+])
+def test_views_within_query_budget(seeded, assert_query_budget, method, name,
+                                   target, data):
+    args = [seeded[target].pk] if target else []
+    assert_query_budget(seeded["client"], reverse(name, args=args), method,
+                        data)
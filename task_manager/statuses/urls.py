@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import (
+    AsyncStatusListView,
     StatusCreateView,
     StatusDeleteView,
     StatusListView,
@@ -9,8 +11,11 @@ from .views import (
 
 app_name = "statuses"
 
+
+list_view = AsyncStatusListView if settings.ASYNC_VIEWS else StatusListView
+
 urlpatterns = [
-    path("", StatusListView.as_view(), name="index"),
+    path("", list_view.as_view(), name="index"),
     path("create/", StatusCreateView.as_view(), name="create"),
     path("<int:pk>/update/", StatusUpdateView.as_view(), name="update"),
     path("<int:pk>/delete/", StatusDeleteView.as_view(), name="delete"),
@@ -4,15 +4,29 @@ from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 
+from task_manager.tasks.models import CollectionVersion
+from task_manager.tasks.versions import ConditionalGetMixin
+from task_manager.users.mixins import AsyncLoginRequiredMixin
+
 from .models import Status
 from .forms import StatusForm
 
 
-class StatusListView(LoginRequiredMixin, ListView):
+class StatusListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     model = Status
+    collections = [CollectionVersion.STATUSES]
     template_name = "statuses/index.html"
     context_object_name = "statuses"
     login_url = "login"
+    query_budget = 4
+
+
+class AsyncStatusListView(AsyncLoginRequiredMixin, StatusListView):
+    async def get(self, request, *args, **kwargs):
+        self.object_list = [obj async for obj in
+                            self.get_queryset().aiterator()]
+        context = self.get_context_data()
+        return self.render_to_response(context)
 
 
 class StatusCreateView(LoginRequiredMixin, CreateView):
@@ -21,6 +35,7 @@ class StatusCreateView(LoginRequiredMixin, CreateView):
     template_name = "statuses/form.html"
     success_url = reverse_lazy("statuses:index")
     login_url = "login"
+    query_budget = 5
 
     def form_valid(self, form):
         messages.success(self.request, "Status created successfully")
@@ -33,6 +48,7 @@ class StatusUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "statuses/form.html"
     success_url = reverse_lazy("statuses:index")
     login_url = "login"
+    query_budget = 6
 
     def form_valid(self, form):
         messages.success(self.request, "Status updated successfully")
@@ -44,15 +60,15 @@ class StatusDeleteView(LoginRequiredMixin, DeleteView):
     template_name = "statuses/confirm_delete.html"
     success_url = reverse_lazy("statuses:index")
     login_url = "login"
+    query_budget = 7
 
-    def post(self, request, *args, **kwargs):
-        status = self.get_object()
-        if status.tasks.exists():
+    def form_valid(self, form):
+        if self.object.tasks.exists():
             messages.error(
-                request,
+                self.request,
                 "Cannot delete status because it is in use",
             )
             return redirect("statuses:index")
-        response = super().post(request, *args, **kwargs)
-        messages.success(request, "Status deleted successfully")
+        response = super().form_valid(form)
+        messages.success(self.request, "Status deleted successfully")
         return response
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task_manager.tasks'
+
+    def ready(self):
+        from task_manager import slowlog, sqlite
+
+        from . import signals  # noqa: F401
+
+        connection_created.connect(slowlog.install)
+        connection_created.connect(sqlite.configure)
@@ -0,0 +1,113 @@
+"""Set-based bulk operations on task querysets.
+
+Every function runs a handful of UPDATE/INSERT/DELETE statements per
+``CHUNK_SIZE`` matching tasks, and never calls ``save()`` or ``delete()``
+on individual instances.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, versions
+from .models import CollectionVersion, Task
+
+CHUNK_SIZE = 1000
+TaskLabel = Task.labels.through
+
+
+def _id_chunks(queryset, chunk_size=CHUNK_SIZE, lock=False):
+    ids = queryset.order_by("id").values_list("id", flat=True)
+    if lock:
+        # Held until commit: nobody changes a chunk between reading it for
+        # the counter deltas and writing it.
+        ids = ids.select_for_update(of=("self",))
+    last = 0
+    while chunk := list(ids.filter(id__gt=last)[:chunk_size]):
+        yield chunk
+        last = chunk[-1]
+
+
+def _update(queryset, **changes):
+    count = 0
+    for chunk in _id_chunks(queryset, lock=True):
+        # Counter deltas come from one grouped read of the locked rows.
+        locked = Task.objects.filter(pk__in=chunk)
+        before = list(counters.grouped_task_rows(locked))
+        count += locked.update(updated_at=timezone.now(), **changes)
+        after = [(changes.get("status_id", status_id),
+                  changes.get("executor_id", executor_id), n)
+                 for status_id, executor_id, n in before]
+        deltas = counters.task_deltas(after)
+        deltas.update(counters.task_deltas(before, sign=-1))
+        counters.apply(deltas)
+    versions.bump(CollectionVersion.TASKS)
+    return count
+
+
+@transaction.atomic
+def set_status(queryset, status):
+    return _update(queryset, status_id=status.pk)
+
+
+@transaction.atomic
+def set_executor(queryset, executor):
+    return _update(queryset, executor_id=executor.pk if executor else None)
+
+
+@transaction.atomic
+def add_labels(queryset, labels):
+    label_ids = [label.pk for label in labels]
+    count = 0
+    for chunk in _id_chunks(queryset):
+        existing = dict(counters.grouped_label_rows(TaskLabel.objects.filter(
+            task_id__in=chunk, label_id__in=label_ids)))
+        counters.apply(counters.label_deltas(
+            (label_id, len(chunk) - existing.get(label_id, 0))
+            for label_id in label_ids))
+        TaskLabel.objects.bulk_create(
+            [TaskLabel(task_id=task_id, label_id=label_id)
+             for task_id in chunk for label_id in label_ids],
+            ignore_conflicts=True,
+        )
+        versions.touch(Task.objects.filter(pk__in=chunk),
+                       CollectionVersion.TASKS)
+        count += len(chunk)
+    return count
+
+
+@transaction.atomic
+def remove_labels(queryset, labels):
+    links = TaskLabel.objects.filter(task__in=queryset.values("id"),
+                                     label__in=labels)
+    counters.apply(counters.label_deltas(
+        counters.grouped_label_rows(links), sign=-1))
+    versions.touch(Task.objects.filter(pk__in=links.values("task_id")),
+                   CollectionVersion.TASKS)
+    deleted, _ = links.delete()
+    return deleted
+
+
+@transaction.atomic
+def delete_tasks(queryset, user):
+    """Delete the tasks in ``queryset`` that ``user`` is the author of.
+
+    The author check is part of the DELETE itself, mirroring
+    ``TaskDeleteView.test_func``.
+    """
+    own = queryset.filter(author=user)
+    count = 0
+    # Re-read the first chunk each round: the rows just deleted drop out.
+    while chunk := list(own.order_by("id").select_for_update(of=("self",))
+                        .values_list("id", flat=True)[:CHUNK_SIZE]):
+        doomed = Task.objects.filter(pk__in=chunk, author=user)
+        deltas = counters.task_deltas(counters.grouped_task_rows(doomed),
+                                      sign=-1)
+        deltas.update(counters.label_deltas(counters.grouped_label_rows(
+            TaskLabel.objects.filter(task_id__in=chunk)), sign=-1))
+        counters.apply(deltas)
+        # A queryset delete skips Task.delete(), whose bookkeeping is done
+        # above; the collector still cascades to the label links.
+        _, deleted = doomed.delete()
+        count += deleted.get(Task._meta.label, 0)
+    versions.bump(CollectionVersion.TASKS)
+    return count
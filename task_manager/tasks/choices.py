@@ -0,0 +1,76 @@
+"""Cached choice lists for the task form and task filter.
+
+Statuses are read once, with the option labels already rendered, and
+stored under a version number. Saving or deleting a status bumps the
+version and rebuilds the lists after commit. The lists only render
+options: fields still validate against the database, so a list that is
+stale (another worker's private cache, or statuses bulk-created without
+signals) never rejects a real status. Executors and labels are
+not cached here: their pickers load options through the autocomplete
+endpoints and only render the selected values. ``EXECUTORS`` is the one
+queryset the task form, bulk form and filter validate executors against.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from task_manager.metrics import record_cache
+from task_manager.statuses.models import Status
+
+VERSION_KEY = "tasks:choices:version"
+DATA_KEY = "tasks:choices:v{}"
+# Short, because with a per-process cache only the worker that changed a
+# status sees the invalidation.
+DATA_TIMEOUT = 60
+
+EXECUTORS = get_user_model().objects.order_by("id")
+
+
+def build_choice_lists() -> dict:
+    return {
+        "statuses": list(Status.objects.order_by("id")
+                         .values_list("id", "name")),
+    }
+
+
+def _bump_version() -> int:
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+        return 1
+
+
+def refresh_choice_lists() -> dict:
+    data = build_choice_lists()
+    cache.set(DATA_KEY.format(_bump_version()), data, DATA_TIMEOUT)
+    return data
+
+
+def get_choice_lists() -> dict:
+    version = cache.get(VERSION_KEY)
+    if version is not None:
+        data = cache.get(DATA_KEY.format(version))
+        if data is not None:
+            record_cache("choices", hit=True)
+            return data
+    record_cache("choices", hit=False)
+    return refresh_choice_lists()
+
+
+def invalidate_choice_lists() -> None:
+    # Bump now so nothing stale is served inside this transaction, and
+    # rebuild after commit so the next request finds the lists warm.
+    _bump_version()
+    transaction.on_commit(refresh_choice_lists, robust=True)
+
+
+def apply_choices(field, choices) -> None:
+    """Render the options of a model choice field from cached ones.
+
+    Only the widget changes; the field keeps validating against its
+    queryset.
+    """
+    empty = [("", field.empty_label)] if field.empty_label is not None else []
+    field.widget.choices = empty + list(choices)
@@ -0,0 +1,158 @@
+"""Maintenance of the denormalized ``TaskCounter`` table.
+
+Writers compute per-key deltas and apply them with ``UPDATE ... SET
+count = count + n`` in the same transaction as the task change, so the
+dashboard can read counts without aggregating ``tasks_task``.
+"""
+
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.users.utils import format_user_display
+
+from .models import Task, TaskCounter
+
+TaskLabel = Task.labels.through
+
+
+def task_keys(status_id, executor_id):
+    executor = executor_id or 0
+    return [
+        (TaskCounter.TOTAL, 0, 0),
+        (TaskCounter.STATUS, status_id, 0),
+        (TaskCounter.EXECUTOR, executor, 0),
+        (TaskCounter.EXECUTOR_STATUS, executor, status_id),
+    ]
+
+
+def task_deltas(rows, sign=1):
+    """Deltas for ``(status_id, executor_id, n)`` rows."""
+    deltas = Counter()
+    for status_id, executor_id, n in rows:
+        for key in task_keys(status_id, executor_id):
+            deltas[key] += sign * n
+    return deltas
+
+
+def label_deltas(rows, sign=1):
+    """Deltas for ``(label_id, n)`` rows."""
+    deltas = Counter()
+    for label_id, n in rows:
+        deltas[(TaskCounter.LABEL, label_id, 0)] += sign * n
+    return deltas
+
+
+def apply(deltas):
+    # Always lock counter rows in the same order, so two transactions
+    # moving tasks in opposite directions cannot deadlock.
+    for (dimension, key, subkey), n in sorted(deltas.items()):
+        if not n:
+            continue
+        counter = TaskCounter.objects.filter(dimension=dimension, key=key,
+                                             subkey=subkey)
+        if counter.update(count=F("count") + n):
+            continue
+        try:
+            with transaction.atomic():
+                TaskCounter.objects.create(dimension=dimension, key=key,
+                                           subkey=subkey, count=n)
+        except IntegrityError:
+            # Created concurrently; the row exists now.
+            counter.update(count=F("count") + n)
+
+
+def grouped_task_rows(queryset):
+    return (queryset.order_by()
+            .values_list("status_id", "executor_id")
+            .annotate(n=Count("id")))
+
+
+def grouped_label_rows(links):
+    return links.order_by().values_list("label_id").annotate(n=Count("id"))
+
+
+def task_saved(task, previous):
+    deltas = task_deltas([(task.status_id, task.executor_id, 1)])
+    if previous is not None:
+        deltas.update(task_deltas([(*previous, 1)], sign=-1))
+    apply(deltas)
+
+
+def task_deleted(previous, label_ids):
+    if previous is None:
+        return  # deleted concurrently; that delete did the counting
+    deltas = task_deltas([(*previous, 1)], sign=-1)
+    deltas.update(label_deltas([(label_id, 1) for label_id in label_ids],
+                               sign=-1))
+    apply(deltas)
+
+
+def compute():
+    """Recount everything from the source tables."""
+    deltas = task_deltas(grouped_task_rows(Task.objects.all()))
+    deltas.update(label_deltas(grouped_label_rows(TaskLabel.objects.all())))
+    return {key: n for key, n in deltas.items() if n}
+
+
+def stored():
+    return {(c.dimension, c.key, c.subkey): c.count
+            for c in TaskCounter.objects.exclude(count=0)}
+
+
+@transaction.atomic
+def rebuild():
+    TaskCounter.objects.all().delete()
+    TaskCounter.objects.bulk_create(
+        TaskCounter(dimension=dimension, key=key, subkey=subkey, count=n)
+        for (dimension, key, subkey), n in compute().items()
+    )
+
+
+def verify():
+    """Return ``{key: (stored, actual)}`` for every counter that is off."""
+    expected, actual = compute(), stored()
+    return {key: (actual.get(key, 0), expected.get(key, 0))
+            for key in expected.keys() | actual.keys()
+            if expected.get(key, 0) != actual.get(key, 0)}
+
+
+def dashboard(user, limit=10):
+    """Counts for the home page, read from ``TaskCounter`` only.
+
+    Names for the few ids shown are looked up by primary key.
+    """
+    counts = TaskCounter.objects.filter(count__gt=0)
+
+    def top(dimension, **filters):
+        return list(counts.filter(dimension=dimension, **filters)
+                    .order_by("-count", "key")[:limit])
+
+    total = counts.filter(dimension=TaskCounter.TOTAL).first()
+    by_status = top(TaskCounter.STATUS)
+    by_executor = top(TaskCounter.EXECUTOR)
+    by_label = top(TaskCounter.LABEL)
+    mine = top(TaskCounter.EXECUTOR_STATUS, key=user.pk)
+
+    statuses = Status.objects.in_bulk(
+        {c.key for c in by_status} | {c.subkey for c in mine})
+    users = get_user_model().objects.in_bulk({c.key for c in by_executor})
+    labels = Label.objects.in_bulk({c.key for c in by_label})
+
+    def executor_name(key):
+        return format_user_display(users[key]) if key in users \
+            else "Unassigned"
+
+    return {
+        "total": total.count if total else 0,
+        "by_status": [(statuses.get(c.key), c.count) for c in by_status],
+        "by_executor": [(executor_name(c.key), c.count)
+                        for c in by_executor],
+        "by_label": [(labels.get(c.key), c.count) for c in by_label],
+        "mine": [(statuses.get(c.subkey), c.count) for c in mine],
+        "mine_total": sum(c.count for c in mine),
+    }
@@ -0,0 +1,71 @@
+"""Streaming export of tasks to CSV and NDJSON."""
+
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from .models import Task
+
+CHUNK_SIZE = 2000
+FIELDS = ["id", "name", "description", "status", "author", "executor",
+          "labels", "created_at"]
+LABEL_SEPARATOR = ";"
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_task_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Yield one dict per task, reading ``chunk_size`` rows at a time.
+
+    Labels are resolved with one query per chunk rather than per task.
+    """
+    rows = (
+        queryset.order_by("id")
+        .values_list("id", "name", "description", "status__name",
+                     "author__username", "executor__username", "created_at")
+        .iterator(chunk_size=chunk_size)
+    )
+    through = Task.labels.through
+    for chunk in _chunks(rows, chunk_size):
+        labels = defaultdict(list)
+        tagged = (
+            through.objects.filter(task_id__in=[row[0] for row in chunk])
+            .order_by("task_id", "label__name")
+            .values_list("task_id", "label__name")
+        )
+        for task_id, label_name in tagged:
+            labels[task_id].append(label_name)
+        for row in chunk:
+            task = dict(zip(FIELDS, row[:6]))
+            task["labels"] = labels[row[0]]
+            task["created_at"] = row[6].isoformat()
+            yield task
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for task in iter_task_rows(queryset, chunk_size):
+        task["labels"] = LABEL_SEPARATOR.join(task["labels"])
+        yield writer.writerow([task[field] for field in FIELDS])
+
+
+def stream_ndjson(queryset, chunk_size=CHUNK_SIZE):
+    for task in iter_task_rows(queryset, chunk_size):
+        yield json.dumps(task, ensure_ascii=False) + "\n"
+
+
+FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
@@ -1,32 +1,41 @@
 import django_filters as df
 from django import forms
-from django.contrib.auth import get_user_model
 
 from task_manager.labels.models import Label
 from task_manager.statuses.models import Status
 from task_manager.users.utils import format_user_display
 
+from .choices import EXECUTORS, apply_choices, get_choice_lists
 from .models import Task
-
-User = get_user_model()
+from .search import search_tasks
+from .widgets import AutocompleteSelect
 
 
 class TaskFilter(df.FilterSet):
+    q = df.CharFilter(
+        method="filter_search",
+        label="Search",
+        widget=forms.TextInput(attrs={"class": "form-control",
+                                      "type": "search"}),
+    )
     status = df.ModelChoiceFilter(
         queryset=Status.objects.all().order_by("id"),
         label="Status",
         widget=forms.Select(attrs={"class": "form-select"}),
     )
     executor = df.ModelChoiceFilter(
-        queryset=User.objects.all().order_by("id"),
+        queryset=EXECUTORS,
         label="Executor",
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteSelect("tasks:autocomplete_executors",
+                                  attrs={"class": "form-select"}),
     )
     label = df.ModelChoiceFilter(
         field_name="labels",
+        method="filter_label",
         queryset=Label.objects.all().order_by("id"),
         label="Label",
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteSelect("tasks:autocomplete_labels",
+                                  attrs={"class": "form-select"}),
     )
     self_tasks = df.BooleanFilter(
         method="filter_self_tasks",
@@ -36,13 +45,26 @@ class TaskFilter(df.FilterSet):
 
     class Meta:
         model = Task
-        fields = ["status", "executor", "label", "self_tasks"]
+        fields = ["q", "status", "executor", "label", "self_tasks"]
 
     def __init__(self, data=None, queryset=None, request=None, **kwargs):
         super().__init__(data=data, queryset=queryset,
                          request=request, **kwargs)
         self.request = request
         self.filters["executor"].field.label_from_instance = format_user_display
+        apply_choices(self.form.fields["status"],
+                      get_choice_lists()["statuses"])
+
+    def filter_search(self, queryset, name, value):
+        return search_tasks(queryset, value)
+
+    def filter_label(self, queryset, name, value):
+        # A semi-join keeps the result in tasks_task id order, so the
+        # (label_id, task_id) index is enough and no sort step is needed.
+        if not value:
+            return queryset
+        tagged = Task.labels.through.objects.filter(label=value)
+        return queryset.filter(id__in=tagged.values("task_id"))
 
     def filter_self_tasks(self, queryset, name, value):
         return queryset.filter(author=self.request.user) if value else queryset
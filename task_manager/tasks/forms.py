@@ -1,11 +1,12 @@
 from django import forms
-from django.contrib.auth import get_user_model
 
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
 from task_manager.users.utils import format_user_display
 
+from .choices import EXECUTORS, apply_choices, get_choice_lists
 from .models import Task
-
-User = get_user_model()
+from .widgets import AutocompleteSelect, AutocompleteSelectMultiple
 
 
 class TaskForm(forms.ModelForm):
@@ -17,9 +18,12 @@ class TaskForm(forms.ModelForm):
             "description": forms.Textarea(attrs={"class": "form-control", 
                                                  "rows": 4}),
             "status": forms.Select(attrs={"class": "form-select"}),
-            "executor": forms.Select(attrs={"class": "form-select"}),
-            "labels": forms.SelectMultiple(attrs={"class": "form-select", 
-                                                  "size": 5}),
+            "executor": AutocompleteSelect(
+                "tasks:autocomplete_executors",
+                attrs={"class": "form-select"}),
+            "labels": AutocompleteSelectMultiple(
+                "tasks:autocomplete_labels",
+                attrs={"class": "form-select", "size": 5}),
         }
         labels = {
             "name": "Name",
@@ -31,5 +35,88 @@ class TaskForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields["executor"].queryset = User.objects.all().order_by("id")
+        self.fields["executor"].queryset = EXECUTORS
+        self.fields["executor"].label_from_instance = format_user_display
+        choices = get_choice_lists()
+        apply_choices(self.fields["status"], choices["statuses"])
+
+    def save(self, commit=True):
+        adding = self.instance._state.adding
+        task = super().save(commit=False)
+        if commit:
+            task.save()
+            labels = self.cleaned_data["labels"]
+            if adding:
+                # Nothing is linked yet: skip the read set() starts with.
+                task.labels.add(*labels)
+            else:
+                task.labels.set(labels)
+        return task
+
+
+class TaskBulkActionForm(forms.Form):
+    # Prefixed so ids do not clash with the filter form on the same page.
+    prefix = "bulk"
+    ACTIONS = [
+        ("set_status", "Set status"),
+        ("set_executor", "Set executor"),
+        ("add_labels", "Add labels"),
+        ("remove_labels", "Remove labels"),
+        ("delete", "Delete"),
+    ]
+    TARGETS = [
+        ("selected", "Selected tasks"),
+        ("filtered", "All tasks matching the filter"),
+    ]
+
+    action = forms.ChoiceField(
+        choices=ACTIONS,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    target = forms.ChoiceField(
+        choices=TARGETS,
+        initial="selected",
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    tasks = forms.ModelMultipleChoiceField(
+        queryset=Task.objects.all(),
+        required=False,
+        widget=forms.MultipleHiddenInput,
+    )
+    query = forms.CharField(required=False, widget=forms.HiddenInput)
+    status = forms.ModelChoiceField(
+        queryset=Status.objects.all(),
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    executor = forms.ModelChoiceField(
+        queryset=EXECUTORS,
+        required=False,
+        widget=AutocompleteSelect("tasks:autocomplete_executors",
+                                  attrs={"class": "form-select"}),
+    )
+    labels = forms.ModelMultipleChoiceField(
+        queryset=Label.objects.all(),
+        required=False,
+        widget=AutocompleteSelectMultiple("tasks:autocomplete_labels",
+                                          attrs={"class": "form-select"}),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.fields["executor"].label_from_instance = format_user_display
+        apply_choices(self.fields["status"],
+                      get_choice_lists()["statuses"])
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get("action")
+        if action == "set_status" and not cleaned_data.get("status"):
+            self.add_error("status", "Choose a status.")
+        if action in ("add_labels", "remove_labels") and \
+                not cleaned_data.get("labels"):
+            self.add_error("labels", "Choose at least one label.")
+        if cleaned_data.get("target") == "selected" and \
+                not cleaned_data.get("tasks"):
+            self.add_error("tasks", "Select at least one task.")
+        return cleaned_data
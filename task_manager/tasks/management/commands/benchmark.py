@@ -0,0 +1,72 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from task_manager import benchmark
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the hot request paths on a seeded test database and "
+            "compare the results with a saved baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument("--users", type=int)
+        parser.add_argument("--labels", type=int)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only",
+                            help="Run scenarios whose name contains this.")
+        parser.add_argument("--output", help="Write the results as JSON.")
+        parser.add_argument("--baseline",
+                            help="Fail on regressions against this file.")
+        parser.add_argument("--threshold", type=float, default=1.25,
+                            help="Allowed p95 and memory growth factor.")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be positive.")
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"], encoding="utf-8") as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline: {exc}") from exc
+
+        # A throwaway database: the benchmark writes users and tasks.
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write(f"Seeding {options['tasks']} tasks...")
+            dataset = benchmark.seed(options["tasks"], options["users"],
+                                     options["labels"], seed=options["seed"])
+            report = benchmark.run(
+                dataset, options["iterations"], options["warmup"],
+                options["only"],
+                progress=lambda name, result: self.stdout.write(
+                    benchmark.format_row(name, result)))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+        if baseline is not None:
+            regressions = benchmark.compare(report, baseline,
+                                            options["threshold"])
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) "
+                                   "against the baseline.")
+            self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,163 @@
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks import counters, versions
+from task_manager.tasks.export import LABEL_SEPARATOR
+from task_manager.tasks.models import CollectionVersion, Task
+
+User = get_user_model()
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        labels = row.get("labels") or ""
+        row["labels"] = [name for name in labels.split(LABEL_SEPARATOR)
+                         if name]
+        yield row
+
+
+def read_ndjson(stream):
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise CommandError(f"Line {line_no}: {exc}") from exc
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+
+class Command(BaseCommand):
+    help = ("Import tasks from a CSV or NDJSON file in the format produced "
+            "by the task export, using batched bulk inserts.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, or - for stdin.")
+        parser.add_argument("--format", choices=READERS,
+                            help="Input format (default: from extension).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--author",
+                            help="Username used when a row has no author.")
+        parser.add_argument("--create-missing", action="store_true",
+                            help="Create unknown statuses and labels.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or path.rsplit(".", 1)[-1]
+        if input_format not in READERS:
+            raise CommandError("Cannot detect format, use --format.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        self.create_missing = options["create_missing"]
+        self.statuses = dict(Status.objects.values_list("name", "id"))
+        self.labels = dict(Label.objects.values_list("name", "id"))
+        self.users = dict(User.objects.values_list("username", "id"))
+        self.default_author = None
+        if options["author"]:
+            self.default_author = self.users.get(options["author"])
+            if self.default_author is None:
+                raise CommandError(f"Unknown user {options['author']!r}.")
+
+        stream = (sys.stdin if path == "-"
+                  else open(path, newline="", encoding="utf-8"))
+        try:
+            self.run(READERS[input_format](stream), options["batch_size"])
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def run(self, rows, batch_size):
+        imported = skipped = 0
+        started = time.monotonic()
+        while batch := list(islice(rows, batch_size)):
+            tasks, task_labels = [], []
+            for row in batch:
+                task = self.build_task(row)
+                if task is None:
+                    skipped += 1
+                    continue
+                tasks.append(task)
+                task_labels.append(self.resolve_labels(row))
+            self.save_batch(tasks, task_labels)
+            imported += len(tasks)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"Imported {imported} tasks, skipped {skipped} "
+                f"({imported / elapsed if elapsed else 0:.0f} rows/s)")
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {imported} tasks imported, {skipped} skipped in "
+            f"{elapsed:.1f}s ({imported / elapsed if elapsed else 0:.0f} "
+            f"rows/s)"))
+
+    @transaction.atomic
+    def save_batch(self, tasks, task_labels):
+        Task.objects.bulk_create(tasks)
+        through = Task.labels.through
+        through.objects.bulk_create(
+            through(task_id=task.pk, label_id=label_id)
+            for task, label_ids in zip(tasks, task_labels)
+            for label_id in label_ids
+        )
+        groups = Counter((task.status_id, task.executor_id)
+                         for task in tasks)
+        deltas = counters.task_deltas(
+            (status_id, executor_id, n)
+            for (status_id, executor_id), n in groups.items())
+        deltas.update(counters.label_deltas(
+            Counter(label_id for label_ids in task_labels
+                    for label_id in label_ids).items()))
+        counters.apply(deltas)
+        versions.bump(CollectionVersion.TASKS)
+
+    def build_task(self, row):
+        name = (row.get("name") or "").strip()
+        status_id = self.lookup(self.statuses, Status, row.get("status"))
+        author_id = self.users.get(row.get("author"), self.default_author)
+        executor = row.get("executor") or None
+        executor_id = self.users.get(executor) if executor else None
+        problem = None
+        if not name:
+            problem = "missing name"
+        elif status_id is None:
+            problem = f"unknown status {row.get('status')!r}"
+        elif author_id is None:
+            problem = f"unknown author {row.get('author')!r}"
+        elif executor and executor_id is None:
+            problem = f"unknown executor {executor!r}"
+        if problem:
+            self.stderr.write(f"Skipping {name or '<no name>'!r}: {problem}")
+            return None
+        return Task(name=name, description=row.get("description") or "",
+                    status_id=status_id, author_id=author_id,
+                    executor_id=executor_id)
+
+    def resolve_labels(self, row):
+        ids = []
+        for name in row.get("labels") or []:
+            label_id = self.lookup(self.labels, Label, name)
+            if label_id is None:
+                self.stderr.write(f"Ignoring unknown label {name!r}")
+            elif label_id not in ids:
+                ids.append(label_id)
+        return ids
+
+    def lookup(self, known, model, name):
+        if not name:
+            return None
+        if name not in known and self.create_missing:
+            known[name] = model.objects.create(name=name).pk
+        return known.get(name)
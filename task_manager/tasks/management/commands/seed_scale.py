@@ -0,0 +1,172 @@
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks import counters, versions
+from task_manager.tasks.choices import invalidate_choice_lists
+from task_manager.tasks.models import CollectionVersion, Task
+
+User = get_user_model()
+
+WORDS = (
+    "api", "backup", "billing", "bug", "cache", "checkout", "cleanup",
+    "config", "crash", "dashboard", "database", "deploy", "docs", "email",
+    "error", "export", "feature", "fix", "import", "index", "invoice",
+    "login", "logs", "memory", "metrics", "migration", "mobile", "monitor",
+    "onboarding", "page", "password", "payment", "performance", "profile",
+    "query", "refactor", "release", "report", "search", "security",
+    "server", "settings", "signup", "slow", "test", "timeout", "ui",
+    "upgrade", "upload", "user",
+)
+STATUS_NAMES = ("new", "in progress", "review", "testing", "done",
+                "blocked", "on hold", "cancelled")
+# Share of tasks with 0, 1, 2, ... labels.
+LABELS_PER_TASK = (0.2, 0.35, 0.25, 0.12, 0.05, 0.03)
+UNASSIGNED = 0.1
+
+
+def power_law(rng, ids, exponent):
+    """Shuffle ``ids`` and return them with cumulative weights falling as
+    ``1 / rank ** exponent``, for ``rng.choices``."""
+    ids = list(ids)
+    rng.shuffle(ids)
+    weights = accumulate(1 / rank ** exponent
+                         for rank in range(1, len(ids) + 1))
+    return ids, list(weights)
+
+
+class Command(BaseCommand):
+    help = ("Generate a large, skewed, reproducible dataset: a few "
+            "executors own most tasks and label usage follows a power law.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tasks", type=int, default=100000)
+        parser.add_argument("--labels", type=int, default=200)
+        parser.add_argument("--statuses", type=int, default=8)
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Same seed, same dataset.")
+        parser.add_argument("--skew", type=float, default=1.1,
+                            help="Power-law exponent for executors, "
+                                 "authors and labels.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--prefix", default="scale",
+                            help="Prefix of generated user, status and "
+                                 "label names.")
+
+    def handle(self, *args, **options):
+        for name in ("users", "statuses", "batch_size"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be "
+                                   "positive.")
+        if options["tasks"] < 0 or options["labels"] < 0:
+            raise CommandError("--tasks and --labels cannot be negative.")
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users named {prefix}* exist; pick another "
+                               "--prefix.")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.started = time.monotonic()
+        user_ids, status_ids, label_ids = self.create_lookups(options)
+        self.create_tasks(options["tasks"], user_ids, status_ids, label_ids,
+                          options["skew"])
+
+        self.stdout.write("Rebuilding task counters and statistics...")
+        counters.rebuild()
+        versions.bump(*CollectionVersion.NAMES)
+        # bulk_create sends no signals.
+        invalidate_choice_lists()
+        if connection.vendor in ("sqlite", "postgresql"):
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.monotonic() - self.started:.1f}s."))
+
+    def create_lookups(self, options):
+        prefix = options["prefix"]
+        users = (User(username=f"{prefix}{i}", first_name=f"First{i}",
+                      last_name=f"Last{i}",
+                      password=UNUSABLE_PASSWORD_PREFIX)
+                 for i in range(options["users"]))
+        statuses = (Status(name=f"{prefix} {STATUS_NAMES[i]}"
+                           if i < len(STATUS_NAMES)
+                           else f"{prefix} status {i}")
+                    for i in range(options["statuses"]))
+        labels = (Label(name=f"{prefix} {self.rng.choice(WORDS)} {i}")
+                  for i in range(options["labels"]))
+        with transaction.atomic():
+            ids = [self.bulk_create(model, objs)
+                   for model, objs in ((User, users), (Status, statuses),
+                                       (Label, labels))]
+        self.report("users, statuses and labels", sum(map(len, ids)))
+        return ids
+
+    def bulk_create(self, model, objs):
+        created = model.objects.bulk_create(objs, batch_size=self.batch_size)
+        return [obj.pk for obj in created]
+
+    def create_tasks(self, total, user_ids, status_ids, label_ids, skew):
+        rng = self.rng
+        executors, executor_weights = power_law(rng, user_ids, skew)
+        authors, author_weights = power_law(rng, user_ids, skew / 2)
+        statuses, status_weights = power_law(rng, status_ids, 1)
+        labels, label_weights = power_law(rng, label_ids, skew)
+        label_counts = range(len(LABELS_PER_TASK))
+        insert_links = self.link_insert_sql()
+
+        created = 0
+        while created < total:
+            size = min(self.batch_size, total - created)
+            tasks = [
+                Task(name=self.words(3, 7).capitalize(),
+                     description=self.words(0, 40),
+                     status_id=status_id, author_id=author_id,
+                     executor_id=(None if rng.random() < UNASSIGNED
+                                  else executor_id))
+                for status_id, author_id, executor_id in zip(
+                    rng.choices(statuses, cum_weights=status_weights, k=size),
+                    rng.choices(authors, cum_weights=author_weights, k=size),
+                    rng.choices(executors, cum_weights=executor_weights,
+                                k=size))
+            ]
+            with transaction.atomic():
+                Task.objects.bulk_create(tasks, batch_size=self.batch_size)
+                links = []
+                if labels:
+                    for task, n in zip(tasks, rng.choices(
+                            label_counts, weights=LABELS_PER_TASK, k=size)):
+                        chosen = rng.choices(labels,
+                                             cum_weights=label_weights, k=n)
+                        links += [(task.pk, label_id)
+                                  for label_id in dict.fromkeys(chosen)]
+                with connection.cursor() as cursor:
+                    cursor.executemany(insert_links, links)
+            created += size
+            self.report("tasks", created)
+
+    def link_insert_sql(self):
+        # Plain tuples skip building a model instance per link.
+        through = Task.labels.through
+        qn = connection.ops.quote_name
+        columns = ", ".join(qn(through._meta.get_field(name).column)
+                            for name in ("task", "label"))
+        return (f"INSERT INTO {qn(through._meta.db_table)} ({columns}) "
+                "VALUES (%s, %s)")
+
+    def words(self, low, high):
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(low,
+                                                                   high)))
+
+    def report(self, what, n):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(f"Created {n} {what} "
+                          f"({n / elapsed if elapsed else 0:.0f} rows/s)")
@@ -0,0 +1,80 @@
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ("Summarize the slow-query log by SQL fingerprint, with the URL "
+            "names and filter combinations that ran each query.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?",
+                            help="Log file (default: SLOW_QUERY_LOG).")
+        parser.add_argument("--top", type=int, default=20,
+                            help="Fingerprints to show, by total time.")
+        parser.add_argument("--url-name",
+                            help="Only queries run by this URL name.")
+        parser.add_argument("--plans", action="store_true",
+                            help="Print the latest EXPLAIN of each query.")
+
+    def handle(self, *args, **options):
+        path = options["path"] or settings.SLOW_QUERY_LOG
+        if not path:
+            raise CommandError("No log file given and SLOW_QUERY_LOG unset.")
+        groups = defaultdict(list)
+        try:
+            with open(path, encoding="utf-8") as log:
+                for line_no, line in enumerate(log, start=1):
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        self.stderr.write(f"Skipping bad line {line_no}")
+                        continue
+                    if (options["url_name"]
+                            and entry.get("url_name") != options["url_name"]):
+                        continue
+                    groups[entry["fingerprint"]].append(entry)
+        except OSError as exc:
+            raise CommandError(exc) from exc
+
+        ranked = sorted(groups.values(),
+                        key=lambda entries: -sum(e["duration_ms"]
+                                                 for e in entries))
+        for entries in ranked[:options["top"]]:
+            self.write_group(entries, options["plans"])
+        self.stdout.write(f"{len(groups)} fingerprints, "
+                          f"{sum(map(len, groups.values()))} slow queries.")
+
+    def write_group(self, entries, plans):
+        durations = [e["duration_ms"] for e in entries]
+        latest = entries[-1]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{latest['fingerprint']}  {len(entries)}x  "
+            f"total {sum(durations):.1f} ms  "
+            f"avg {sum(durations) / len(durations):.1f} ms  "
+            f"max {max(durations):.1f} ms"))
+        self.stdout.write(f"  {latest['sql'][:300]}")
+        combos = defaultdict(list)
+        for e in entries:
+            key = (e.get("url_name") or "-",
+                   ",".join(e.get("filters") or []) or "(no filters)")
+            combos[key].append(e["duration_ms"])
+        for (url_name, filters), times in sorted(
+                combos.items(), key=lambda item: -sum(item[1])):
+            self.stdout.write(f"  {url_name} [{filters}]: {len(times)}x, "
+                              f"avg {sum(times) / len(times):.1f} ms")
+        views = Counter(e.get("view") for e in entries if e.get("view"))
+        if views:
+            self.stdout.write("  views: " + ", ".join(
+                f"{view} ({n})" for view, n in views.most_common()))
+        if plans and latest.get("plan"):
+            plan = latest["plan"]
+            if isinstance(plan, list) and all(isinstance(p, str)
+                                              for p in plan):
+                plan = "\n".join(plan)
+            elif not isinstance(plan, str):
+                plan = json.dumps(plan, indent=2)
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
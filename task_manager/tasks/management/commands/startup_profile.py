@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+# What a fresh process imports before it can do its work: a management
+# command stops after django.setup(); a worker also builds the WSGI
+# handler (middleware) and loads the URLconf before its first response.
+TARGETS = {
+    "command": "import django; django.setup()",
+    "worker": ("from django.core.wsgi import get_wsgi_application; "
+               "get_wsgi_application(); "
+               "from django.urls import get_resolver; "
+               "get_resolver().url_patterns"),
+}
+
+
+def parse_importtime(text):
+    """Return ``{module: self microseconds}`` from ``-X importtime``."""
+    modules = {}
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            modules[name.strip()] = int(self_us)
+    return modules
+
+
+def aggregate(modules, depth):
+    """Sum self time and count modules per dotted prefix of ``depth``."""
+    groups = defaultdict(lambda: [0, 0])
+    for name, self_us in modules.items():
+        group = groups[".".join(name.split(".")[:depth])]
+        group[0] += self_us
+        group[1] += 1
+    return groups
+
+
+class Command(BaseCommand):
+    help = ("Report import time of a fresh process per package, like "
+            "python -X importtime but aggregated.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=TARGETS, default="worker",
+                            help="Startup to profile (default: worker).")
+        parser.add_argument("--depth", type=int, default=1,
+                            help="Dotted name components to group by.")
+        parser.add_argument("--top", type=int, default=25,
+                            help="Groups to show, by self time.")
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="Runs; each module's fastest is kept.")
+
+    def handle(self, *args, **options):
+        runs = [self.profile(TARGETS[options["target"]])
+                for _ in range(options["repeat"])]
+        modules = {name: min(run.get(name, us) for run in runs)
+                   for name, us in runs[0].items()}
+        groups = aggregate(modules, options["depth"])
+        total = sum(modules.values())
+        self.stdout.write(
+            f"{options['target']}: {len(modules)} modules, "
+            f"{total / 1000:.1f} ms importing "
+            f"(fastest of {options['repeat']} runs)")
+        self.stdout.write(f"{'module':<40} {'self ms':>8} {'modules':>8} "
+                          f"{'share':>6}")
+        ranked = sorted(groups.items(), key=lambda item: -item[1][0])
+        for name, (self_us, count) in ranked[:options["top"]]:
+            self.stdout.write(f"{name:<40} {self_us / 1000:>8.1f} "
+                              f"{count:>8} {self_us / total:>6.1%}")
+
+    def profile(self, code):
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", "task_manager.settings")
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return parse_importtime(result.stderr)
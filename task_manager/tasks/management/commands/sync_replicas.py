@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+def copy_sqlite(source, target):
+    """Copy the SQLite database ``source`` into ``target`` consistently,
+    while other processes keep using both."""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+    src.close()
+    dst.close()
+
+
+class Command(BaseCommand):
+    help = ("Copy a SQLite primary into the SQLite DATABASE_REPLICAS, to "
+            "try replica routing locally.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--watch", type=float, metavar="SECONDS",
+                            help="Keep copying every SECONDS.")
+
+    def handle(self, *args, **options):
+        databases = settings.DATABASES
+        aliases = [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No DATABASE_REPLICA_URLS configured.")
+        if any("sqlite" not in databases[alias]["ENGINE"]
+               for alias in aliases):
+            raise CommandError("Only SQLite databases can be copied; use "
+                               "the database's own replication.")
+        source = databases[DEFAULT_DB_ALIAS]["NAME"]
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                copy_sqlite(source, databases[alias]["NAME"])
+            self.stdout.write(f"Copied {source} to "
+                              f"{len(settings.DATABASE_REPLICAS)} "
+                              "replica(s).")
+            if not options["watch"]:
+                break
+            time.sleep(options["watch"])
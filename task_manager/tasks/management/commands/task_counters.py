@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.tasks import counters
+
+
+class Command(BaseCommand):
+    help = "Verify or rebuild the denormalized task counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["verify", "rebuild"])
+
+    def handle(self, *args, **options):
+        if options["action"] == "rebuild":
+            counters.rebuild()
+            self.stdout.write(self.style.SUCCESS("Task counters rebuilt."))
+            return
+        mismatches = counters.verify()
+        for (dimension, key, subkey), (stored, actual) in sorted(
+                mismatches.items()):
+            self.stdout.write(f"{dimension} {key}/{subkey}: stored {stored}, "
+                              f"actual {actual}")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} counter(s) out of date; "
+                               "run 'task_counters rebuild'.")
+        self.stdout.write(self.style.SUCCESS("Task counters are accurate."))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:59
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskCounter = apps.get_model('tasks', 'TaskCounter')
+    counts = Counter()
+    rows = (Task.objects.order_by()
+            .values_list('status_id', 'executor_id')
+            .annotate(n=Count('id')))
+    for status_id, executor_id, n in rows:
+        executor = executor_id or 0
+        counts[('total', 0, 0)] += n
+        counts[('status', status_id, 0)] += n
+        counts[('executor', executor, 0)] += n
+        counts[('executor_status', executor, status_id)] += n
+    links = (Task.labels.through.objects.order_by()
+             .values_list('label_id').annotate(n=Count('id')))
+    for label_id, n in links:
+        counts[('label', label_id, 0)] += n
+    TaskCounter.objects.bulk_create(
+        TaskCounter(dimension=dimension, key=key, subkey=subkey, count=n)
+        for (dimension, key, subkey), n in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('status', 'Status'), ('executor', 'Executor'), ('label', 'Label'), ('executor_status', 'Executor and status')], max_length=20)),
+                ('key', models.BigIntegerField(default=0)),
+                ('subkey', models.BigIntegerField(default=0)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dimension', '-count'], name='task_counter_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key', 'subkey'), name='task_counter_unique_key')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
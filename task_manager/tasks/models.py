@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 from task_manager.labels.models import Label
 from task_manager.statuses.models import Status
@@ -23,11 +23,123 @@ class Task(models.Model):
         related_name="executed_tasks",
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     labels = models.ManyToManyField(Label, related_name="labeled_tasks", 
                                     blank=True)
 
     class Meta:
         ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "id"],
+                         name="task_status_id_idx"),
+            models.Index(fields=["executor", "id"],
+                         name="task_executor_id_idx"),
+            models.Index(fields=["author", "id"],
+                         name="task_author_id_idx"),
+            models.Index(fields=["status", "executor", "id"],
+                         name="task_status_executor_id_idx"),
+            models.Index(fields=["author", "status", "id"],
+                         name="task_author_status_id_idx"),
+            models.Index(fields=["author", "executor", "id"],
+                         name="task_author_executor_id_idx"),
+            models.Index(fields=["name", "id"], name="task_name_id_idx"),
+            models.Index(fields=["created_at", "id"],
+                         name="task_created_at_id_idx"),
+            # The name and created_at sorts within a status or executor.
+            models.Index(fields=["status", "name", "id"],
+                         name="task_status_name_id_idx"),
+            models.Index(fields=["status", "created_at", "id"],
+                         name="task_status_created_id_idx"),
+            models.Index(fields=["executor", "name", "id"],
+                         name="task_executor_name_id_idx"),
+            models.Index(fields=["executor", "created_at", "id"],
+                         name="task_executor_created_id_idx"),
+        ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        from . import counters
+
+        with transaction.atomic(using=kwargs.get("using")):
+            previous = None if self._state.adding else self._lock_counted()
+            super().save(*args, **kwargs)
+            counters.task_saved(self, previous)
+
+    def delete(self, *args, **kwargs):
+        from . import counters, versions
+
+        with transaction.atomic(using=kwargs.get("using")):
+            previous = self._lock_counted()
+            label_ids = list(self.labels.values_list("id", flat=True))
+            result = super().delete(*args, **kwargs)
+            counters.task_deleted(previous, label_ids)
+            versions.bump(CollectionVersion.TASKS)
+        return result
+
+    def _lock_counted(self):
+        """Lock the row and return its stored ``(status_id, executor_id)``.
+
+        Read at write time, not when the instance was loaded, so that two
+        overlapping edits of one task both subtract what the row held.
+        """
+        return (Task.objects.select_for_update().filter(pk=self.pk)
+                .values_list("status_id", "executor_id").first())
+
+
+class TaskCounter(models.Model):
+    """Denormalized task counts, kept current on every task write."""
+
+    TOTAL = "total"
+    STATUS = "status"
+    EXECUTOR = "executor"
+    LABEL = "label"
+    EXECUTOR_STATUS = "executor_status"
+    DIMENSIONS = [
+        (TOTAL, "Total"),
+        (STATUS, "Status"),
+        (EXECUTOR, "Executor"),
+        (LABEL, "Label"),
+        (EXECUTOR_STATUS, "Executor and status"),
+    ]
+
+    dimension = models.CharField(max_length=20, choices=DIMENSIONS)
+    # Status, user or label id; 0 stands for "no executor".
+    key = models.BigIntegerField(default=0)
+    subkey = models.BigIntegerField(default=0)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dimension", "key", "subkey"],
+                                    name="task_counter_unique_key"),
+        ]
+        indexes = [
+            models.Index(fields=["dimension", "-count"],
+                         name="task_counter_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key}:{self.subkey}={self.count}"
+
+
+class CollectionVersion(models.Model):
+    """A version stamp bumped on every write to a collection.
+
+    List pages derive their ETag and Last-Modified from these rows, which
+    also catch deletes and changes to users (who have no ``updated_at``).
+    """
+
+    TASKS = "tasks"
+    STATUSES = "statuses"
+    LABELS = "labels"
+    USERS = "users"
+    NAMES = [TASKS, STATUSES, LABELS, USERS]
+
+    name = models.CharField(max_length=20, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}@{self.version}"
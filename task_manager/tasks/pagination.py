@@ -0,0 +1,145 @@
+"""Keyset (cursor) pagination for large querysets."""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor cannot be decoded or does not fit the ordering."""
+
+
+def _json_default(value: Any) -> str:
+    return value.isoformat()
+
+
+def encode_cursor(values: list, backwards: bool = False) -> str:
+    raw = json.dumps({"v": values, "b": backwards},
+                     separators=(",", ":"), default=_json_default)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[list, bool]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return list(payload["v"]), bool(payload["b"])
+    except (ValueError, KeyError, TypeError, binascii.Error) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """Paginate a queryset by seeking past the last seen sort key.
+
+    The ordering is always completed with the primary key so that every
+    row has a unique position; pages are fetched with ``LIMIT per_page + 1``
+    and never run ``OFFSET`` or ``COUNT(*)``.
+    """
+
+    def __init__(self, queryset, ordering, per_page: int):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+        if self.keys[-1][0] not in ("id", "pk"):
+            self.keys.append(("id", self.keys[0][1]))
+        self.fields = [self._get_field(name) for name, _ in self.keys]
+
+    def _get_field(self, name):
+        opts = self.queryset.model._meta
+        if name == "pk":
+            return opts.pk
+        annotations = self.queryset.query.annotations
+        if name in annotations:
+            return annotations[name].output_field
+        return opts.get_field(name)
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        qs, values, backwards = self._prepare(cursor)
+        rows = list(qs)
+        if backwards and len(rows) <= self.per_page:
+            # Reached the head of the list: serve a full first page.
+            return self.page(None)
+        return self._build(rows, values, backwards)
+
+    async def apage(self, cursor: str | None = None) -> KeysetPage:
+        qs, values, backwards = self._prepare(cursor)
+        rows = [obj async for obj in
+                qs.aiterator(chunk_size=self.per_page + 1)]
+        if backwards and len(rows) <= self.per_page:
+            return await self.apage(None)
+        return self._build(rows, values, backwards)
+
+    def _prepare(self, cursor):
+        values, backwards = (decode_cursor(cursor) if cursor
+                             else (None, False))
+        qs = self.queryset.order_by(*self._order_by(backwards))
+        if values is not None:
+            qs = qs.filter(self._seek(self._to_python(values), backwards))
+        return qs[: self.per_page + 1], values, backwards
+
+    def _build(self, rows, values, backwards) -> KeysetPage:
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, True
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        page = KeysetPage(rows)
+        if rows and has_next:
+            page.next_cursor = encode_cursor(self._key(rows[-1]))
+        if rows and has_previous:
+            page.previous_cursor = encode_cursor(self._key(rows[0]), True)
+        return page
+
+    def _order_by(self, backwards: bool) -> list[str]:
+        return [("-" if desc != backwards else "") + name
+                for name, desc in self.keys]
+
+    def _seek(self, values: list, backwards: bool) -> Q:
+        condition = Q()
+        equal = Q()
+        for (name, desc), value in zip(self.keys, values):
+            lookup = "lt" if desc != backwards else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _to_python(self, values: list) -> list:
+        if len(values) != len(self.fields):
+            raise InvalidCursor(values)
+        try:
+            return [field.to_python(value)
+                    for field, value in zip(self.fields, values)]
+        except ValidationError as exc:
+            raise InvalidCursor(values) from exc
+
+    def _key(self, obj) -> list:
+        return [getattr(obj, name) for name, _ in self.keys]
@@ -0,0 +1,68 @@
+"""Full-text search over task name and description.
+
+SQLite keeps an external-content FTS5 table in sync with triggers;
+Postgres has a generated ``tsvector`` column with a GIN index. Both are
+maintained by the database, so bulk inserts, updates and raw deletes stay
+searchable too. Other backends fall back to ``icontains``.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+def search_terms(query):
+    return re.findall(r"\w+", query or "")
+
+
+def _fts5_query(terms):
+    # Quoted prefix tokens, implicitly ANDed.
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _tsquery(terms):
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def search_tasks(queryset, query):
+    """Restrict ``queryset`` to tasks matching every term of ``query``."""
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        matches = RawSQL("SELECT rowid FROM tasks_task_fts "
+                         "WHERE tasks_task_fts MATCH %s",
+                         (_fts5_query(terms),))
+        return queryset.filter(id__in=matches)
+    if vendor == "postgresql":
+        matches = RawSQL("SELECT id FROM tasks_task WHERE search_vector "
+                         "@@ to_tsquery('simple', %s)", (_tsquery(terms),))
+        return queryset.filter(id__in=matches)
+    condition = Q()
+    for term in terms:
+        condition &= (Q(name__icontains=term)
+                      | Q(description__icontains=term))
+    return queryset.filter(condition)
+
+
+def rank_tasks(queryset, query):
+    """Annotate ``rank``: lower is more relevant, ties broken by id.
+
+    Name matches weigh more than description matches.
+    """
+    terms = search_terms(query)
+    vendor = connections[queryset.db].vendor
+    if terms and vendor == "sqlite":
+        rank = RawSQL("SELECT bm25(tasks_task_fts, 10.0, 1.0) "
+                      "FROM tasks_task_fts WHERE tasks_task_fts MATCH %s "
+                      "AND rowid = tasks_task.id", (_fts5_query(terms),),
+                      output_field=FloatField())
+    elif terms and vendor == "postgresql":
+        rank = RawSQL("-ts_rank(tasks_task.search_vector, "
+                      "to_tsquery('simple', %s))",
+                      (_tsquery(terms),), output_field=FloatField())
+    else:
+        rank = Value(0.0, output_field=FloatField())
+    return queryset.annotate(rank=rank)
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+
+from . import counters, versions
+from .choices import invalidate_choice_lists
+from .models import CollectionVersion, Task, TaskCounter
+
+COLLECTIONS = {
+    Task: CollectionVersion.TASKS,
+    Status: CollectionVersion.STATUSES,
+    Label: CollectionVersion.LABELS,
+    get_user_model(): CollectionVersion.USERS,
+}
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_delete, sender=Status)
+def choices_changed(sender, **kwargs):
+    invalidate_choice_lists()
+
+
+def collection_changed(sender, update_fields=None, **kwargs):
+    # Logging in only stamps last_login, which no page shows.
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    versions.bump(COLLECTIONS[sender])
+
+
+for model in COLLECTIONS:
+    post_save.connect(collection_changed, sender=model)
+    # Task.delete() bumps its own version: a post_delete receiver would make
+    # every queryset delete load and signal tasks one by one.
+    if model is not Task:
+        post_delete.connect(collection_changed, sender=model)
+
+
+@receiver(m2m_changed, sender=Task.labels.through)
+def task_labels_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    owner = "label_id" if reverse else "task_id"
+    if action == "post_add" and pk_set:
+        if reverse:
+            rows = [(instance.pk, len(pk_set))]
+        else:
+            rows = [(label_id, 1) for label_id in pk_set]
+        counters.apply(counters.label_deltas(rows))
+    elif action in ("pre_remove", "pre_clear"):
+        # pk_set may name labels that are not linked; count real links.
+        links = sender.objects.filter(**{owner: instance.pk})
+        if action == "pre_remove":
+            other = "task_id" if reverse else "label_id"
+            links = links.filter(**{f"{other}__in": pk_set})
+        counters.apply(counters.label_deltas(
+            counters.grouped_label_rows(links), sign=-1))
+    if action == "pre_clear" or (action in ("post_add", "post_remove")
+                                 and pk_set):
+        if not reverse:
+            tasks = Task.objects.filter(pk=instance.pk)
+        elif action == "pre_clear":
+            tasks = Task.objects.filter(pk__in=sender.objects.filter(
+                label_id=instance.pk).values("task_id"))
+        else:
+            tasks = Task.objects.filter(pk__in=pk_set)
+        versions.touch(tasks, CollectionVersion.TASKS)
+
+
+@receiver(post_delete, sender=Label)
+def label_deleted(sender, instance, **kwargs):
+    TaskCounter.objects.filter(dimension=TaskCounter.LABEL,
+                               key=instance.pk).delete()
@@ -1,10 +1,32 @@
+import collections
+import csv
+import io
+import itertools
+import json
+
 import pytest
-from django.test import Client
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import Http404
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from task_manager.labels.models import Label
 from task_manager.statuses.models import Status
-from task_manager.tasks.models import Task
+from task_manager.tasks import counters
+from task_manager.tasks.choices import get_choice_lists
+from task_manager.tasks.export import iter_task_rows
+from task_manager.tasks.filters import TaskFilter
+from task_manager.tasks.models import Task, TaskCounter
+from task_manager.tasks.views import (
+    AsyncTaskDetailView,
+    AsyncTaskListView,
+    TaskListView,
+)
 
 User = get_user_model()
 pytestmark = pytest.mark.django_db
@@ -110,3 +132,743 @@ def test_only_author_can_delete(auth_client, users, status_new):
     r2 = c.post(reverse("tasks:delete", args=[t.pk]))
     assert r2.status_code in (302, 301)
     assert not Task.objects.filter(pk=t.pk).exists()
+
+
+@pytest.fixture
+def many_tasks(users, status_new):
+    return Task.objects.bulk_create(
+        Task(name=f"Task {i:03}", status=status_new, author=users["u1"])
+        for i in range(TaskListView.page_size * 2 + 5)
+    )
+
+
+def test_list_is_paginated_by_cursor(auth_client, many_tasks):
+    size = TaskListView.page_size
+    r = auth_client.get(reverse("tasks:index"))
+    first = list(r.context["tasks"])
+    assert first == many_tasks[:size]
+    assert "previous_url" not in r.context
+
+    r2 = auth_client.get(reverse("tasks:index") + r.context["next_url"])
+    assert list(r2.context["tasks"]) == many_tasks[size:size * 2]
+
+    r3 = auth_client.get(reverse("tasks:index") + r2.context["next_url"])
+    assert list(r3.context["tasks"]) == many_tasks[size * 2:]
+    assert not r3.context["page"].has_next
+
+    back = auth_client.get(reverse("tasks:index")
+                           + r3.context["previous_url"])
+    assert list(back.context["tasks"]) == many_tasks[size:size * 2]
+
+
+def test_list_pagination_is_stable_on_insert(auth_client, users,
+                                             status_new, many_tasks):
+    size = TaskListView.page_size
+    r = auth_client.get(reverse("tasks:index") + "?sort=-id")
+    assert list(r.context["tasks"]) == many_tasks[::-1][:size]
+    Task.objects.create(name="Fresh", status=status_new, author=users["u1"])
+    r2 = auth_client.get(reverse("tasks:index") + r.context["next_url"])
+    assert list(r2.context["tasks"]) == many_tasks[::-1][size:size * 2]
+
+
+def test_list_pagination_keeps_filters(auth_client, users, status_new,
+                                       many_tasks):
+    other = Status.objects.create(name="other")
+    Task.objects.filter(pk__in=[t.pk for t in many_tasks[::2]]) \
+        .update(status=other)
+    r = auth_client.get(reverse("tasks:index"),
+                        {"status": other.pk, "sort": "name"})
+    assert f"status={other.pk}" in r.context["next_url"]
+    r2 = auth_client.get(reverse("tasks:index") + r.context["next_url"])
+    assert all(t.status_id == other.pk for t in r2.context["tasks"])
+
+
+def test_list_does_not_count_or_offset(auth_client, many_tasks):
+    with CaptureQueriesContext(connection) as ctx:
+        auth_client.get(reverse("tasks:index") + "?sort=-created_at")
+    sql = " ".join(q["sql"] for q in ctx.captured_queries).upper()
+    assert "COUNT(" not in sql
+    assert "OFFSET" not in sql
+
+
+def test_list_invalid_cursor(auth_client):
+    r = auth_client.get(reverse("tasks:index"), {"cursor": "garbage"})
+    assert r.status_code == 404
+
+
+def explain_task_filter(params, user, sort="id"):
+    request = RequestFactory().get(reverse("tasks:index"))
+    request.user = user
+    qs = TaskFilter(params, queryset=Task.objects.all(), request=request).qs
+    # Completed with the primary key, as KeysetPaginator does.
+    tiebreak = "-id" if sort.startswith("-") else "id"
+    qs = qs.order_by(*dict.fromkeys([sort, tiebreak]))
+    qs = qs[:TaskListView.page_size + 1]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+    return qs.explain()
+
+
+def test_filter_combinations_use_indexes(users, status_new):
+    if connection.vendor not in ("sqlite", "postgresql"):
+        pytest.skip("EXPLAIN check supports SQLite and Postgres only")
+    label = Label.objects.create(name="bug")
+    params = {"status": status_new.pk, "executor": users["u2"].pk,
+              "label": label.pk, "self_tasks": "true"}
+    for size in range(1, len(params) + 1):
+        for combo in itertools.combinations(params, size):
+            plan = explain_task_filter({k: params[k] for k in combo},
+                                       users["u1"])
+            if connection.vendor == "sqlite":
+                assert "TEMP B-TREE" not in plan, (combo, plan)
+                assert "SCAN tasks_task" not in plan, (combo, plan)
+            else:
+                assert "Seq Scan" not in plan, (combo, plan)
+                assert "Sort Key" not in plan, (combo, plan)
+
+
+@pytest.mark.parametrize("sort", ["name", "-name", "created_at",
+                                  "-created_at"])
+def test_filtered_sorts_use_indexes(users, status_new, sort):
+    if connection.vendor not in ("sqlite", "postgresql"):
+        pytest.skip("EXPLAIN check supports SQLite and Postgres only")
+    params = {"status": status_new.pk, "executor": users["u2"].pk}
+    for combo in (["status"], ["executor"], ["status", "executor"]):
+        plan = explain_task_filter({k: params[k] for k in combo},
+                                   users["u1"], sort)
+        if connection.vendor == "sqlite":
+            assert "SCAN tasks_task" not in plan, (combo, plan)
+            if len(combo) == 1:
+                assert "TEMP B-TREE" not in plan, (combo, plan)
+        else:
+            assert "Seq Scan" not in plan, (combo, plan)
+            if len(combo) == 1:
+                assert "Sort Key" not in plan, (combo, plan)
+
+
+def test_form_choices_come_from_cache(auth_client, users, status_new):
+    Label.objects.create(name="bug")
+    auth_client.get(reverse("tasks:create"))
+    with CaptureQueriesContext(connection) as ctx:
+        r = auth_client.get(reverse("tasks:create"))
+    sql = " ".join(q["sql"] for q in ctx.captured_queries)
+    assert "statuses_status" not in sql
+    assert "labels_label" not in sql
+    html = r.content.decode()
+    assert ">new</option>" in html
+    assert ">bug</option>" not in html
+    assert ">user2</option>" not in html
+
+
+def test_filter_status_choices_from_cache(users, status_new):
+    get_choice_lists()
+    with CaptureQueriesContext(connection) as ctx:
+        html = str(TaskFilter(queryset=Task.objects.none()).form["status"])
+    assert ctx.captured_queries == []
+    assert '<option value="" selected>---------</option>' in html
+    assert f'<option value="{status_new.pk}">new</option>' in html
+    unknown = TaskFilter({"status": status_new.pk + 1},
+                         queryset=Task.objects.all())
+    assert not unknown.is_valid()
+    assert TaskFilter({"status": status_new.pk},
+                      queryset=Task.objects.all()).is_valid()
+
+
+def test_status_filter_accepts_status_missing_from_cache(auth_client, users,
+                                                        status_new):
+    auth_client.get(reverse("tasks:index"))  # caches the status list
+    # bulk_create sends no signals, as with another worker's private cache.
+    [fresh] = Status.objects.bulk_create([Status(name="fresh")])
+    task = Task.objects.create(name="T", status=fresh, author=users["u1"])
+    r = auth_client.get(reverse("tasks:index"), {"status": fresh.pk})
+    assert [t.pk for t in r.context["tasks"]] == [task.pk]
+
+
+def test_status_choices_refresh_on_change(auth_client, status_new):
+    auth_client.get(reverse("tasks:index"))
+    Status.objects.create(name="in progress")
+    html = auth_client.get(reverse("tasks:index")).content.decode()
+    assert ">in progress</option>" in html
+    status_new.delete()
+    html = auth_client.get(reverse("tasks:index")).content.decode()
+    assert ">new</option>" not in html
+
+
+def test_form_renders_only_selected_executor_and_labels(auth_client, users,
+                                                        status_new):
+    bug = Label.objects.create(name="bug")
+    Label.objects.create(name="feature")
+    t = Task.objects.create(name="T", status=status_new, author=users["u1"],
+                            executor=users["u2"])
+    t.labels.add(bug)
+    html = auth_client.get(
+        reverse("tasks:update", args=[t.pk])).content.decode()
+    assert f'<option value="{users["u2"].pk}" selected>user2</option>' \
+        in html
+    assert ">user1</option>" not in html
+    assert f'<option value="{bug.pk}" selected>bug</option>' in html
+    assert ">feature</option>" not in html
+    assert 'data-autocomplete-url="/tasks/autocomplete/labels/"' in html
+
+
+def test_executor_autocomplete_prefix_search(auth_client, users):
+    User.objects.create_user(username="zed", first_name="Alina")
+    User.objects.create_user(username="amy", last_name="Usher")
+    url = reverse("tasks:autocomplete_executors")
+    r = auth_client.get(url, {"q": "US"})
+    texts = [item["text"] for item in r.json()["results"]]
+    assert texts == ["user1", "user2", "Usher"]
+    r = auth_client.get(url, {"q": "ali"})
+    assert [item["text"] for item in r.json()["results"]] == ["Alina"]
+
+
+def test_autocomplete_matches_cyrillic_in_any_case(auth_client):
+    Label.objects.create(name="Фикс")
+    Label.objects.create(name="фильтр")
+    Label.objects.create(name="Баг")
+    url = reverse("tasks:autocomplete_labels")
+    for term in ("ф", "Ф", "фи", "ФИ"):
+        r = auth_client.get(url, {"q": term})
+        assert ([item["text"] for item in r.json()["results"]]
+                == ["Фикс", "фильтр"]), term
+    r = auth_client.get(url, {"q": "фик"})
+    assert [item["text"] for item in r.json()["results"]] == ["Фикс"]
+
+
+def test_label_autocomplete_is_capped_with_cursor(auth_client):
+    Label.objects.bulk_create(Label(name=f"tag{i:02}") for i in range(7))
+    Label.objects.create(name="other")
+    url = reverse("tasks:autocomplete_labels")
+    r = auth_client.get(url, {"q": "Tag", "limit": 5})
+    data = r.json()
+    assert [i["text"] for i in data["results"]] == [
+        f"tag{i:02}" for i in range(5)]
+    r2 = auth_client.get(url, {"q": "tag", "limit": 5,
+                               "cursor": data["next"]})
+    data2 = r2.json()
+    assert [i["text"] for i in data2["results"]] == ["tag05", "tag06"]
+    assert data2["next"] is None
+
+
+def test_executor_autocomplete_pages_across_fields(auth_client):
+    bob = User.objects.create_user(username="bob", first_name="Anna")
+    alex = User.objects.create_user(username="alex", last_name="Avery")
+    amy = User.objects.create_user(username="amy")
+    url = reverse("tasks:autocomplete_executors")
+    seen, cursor = [], None
+    for _ in range(4):
+        params = {"q": "a", "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        data = auth_client.get(url, params).json()
+        seen += [item["id"] for item in data["results"]]
+        cursor = data["next"]
+        if not cursor:
+            break
+    # Each user once, at the smallest of its matching keys.
+    assert seen == [alex.pk, amy.pk, bob.pk]
+    r = auth_client.get(url, {"q": "a", "cursor": "garbage"})
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize("view", ["tasks:autocomplete_executors",
+                                  "tasks:autocomplete_labels"])
+def test_autocomplete_reads_pages_in_index_order(auth_client, view):
+    if connection.vendor != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN check is SQLite only")
+    for name in ("alpha", "alps"):
+        Label.objects.create(name=name)
+        User.objects.create_user(username=name)
+    with CaptureQueriesContext(connection) as ctx:
+        data = auth_client.get(reverse(view), {"q": "a", "limit": 1}).json()
+        auth_client.get(reverse(view), {"q": "a", "limit": 1,
+                                        "cursor": data["next"]})
+    scans = [q["sql"] for q in ctx.captured_queries
+             if "LOWER(" in q["sql"]]
+    assert scans
+    with connection.cursor() as cursor:
+        for sql in scans:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+            assert "TEMP B-TREE" not in plan, plan
+            assert "USING INDEX" in plan, plan
+
+
+def test_autocomplete_requires_login(client):
+    r = client.get(reverse("tasks:autocomplete_labels"))
+    assert r.status_code in (302, 301)
+
+
+@pytest.fixture
+def labelled_tasks(users, status_new):
+    bug = Label.objects.create(name="bug")
+    ui = Label.objects.create(name="ui")
+    done = Status.objects.create(name="done")
+    t1 = Task.objects.create(name="First", status=status_new,
+                             author=users["u1"], executor=users["u2"])
+    t1.labels.add(bug, ui)
+    t2 = Task.objects.create(name="Second", description="multi\nline",
+                             status=done, author=users["u2"])
+    return {"t1": t1, "t2": t2, "done": done}
+
+
+def test_export_csv(auth_client, labelled_tasks):
+    r = auth_client.get(reverse("tasks:export"), {"format": "csv"})
+    assert r.status_code == 200
+    assert r.streaming
+    assert r["Content-Type"] == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(
+        b"".join(r.streaming_content).decode())))
+    assert [row["name"] for row in rows] == ["First", "Second"]
+    assert rows[0]["labels"] == "bug;ui"
+    assert rows[0]["executor"] == "user2"
+    assert rows[1]["description"] == "multi\nline"
+    assert rows[1]["status"] == "done"
+
+
+def test_export_ndjson_uses_filters(auth_client, labelled_tasks):
+    r = auth_client.get(reverse("tasks:export"),
+                        {"format": "ndjson",
+                         "status": labelled_tasks["done"].pk})
+    lines = b"".join(r.streaming_content).decode().splitlines()
+    tasks = [json.loads(line) for line in lines]
+    assert [t["id"] for t in tasks] == [labelled_tasks["t2"].pk]
+    assert tasks[0]["labels"] == []
+    assert tasks[0]["executor"] is None
+
+
+def test_export_resolves_labels_per_chunk(labelled_tasks, users,
+                                          status_new):
+    for i in range(5):
+        Task.objects.create(name=f"T{i}", status=status_new,
+                            author=users["u1"])
+    with CaptureQueriesContext(connection) as ctx:
+        rows = list(iter_task_rows(Task.objects.all(), chunk_size=3))
+    assert len(rows) == 7
+    label_queries = [q for q in ctx.captured_queries
+                     if "tasks_task_labels" in q["sql"]]
+    assert len(label_queries) == 3
+
+
+def test_export_rejects_unknown_format(auth_client):
+    r = auth_client.get(reverse("tasks:export"), {"format": "xml"})
+    assert r.status_code == 400
+
+
+def test_import_tasks_roundtrip(auth_client, labelled_tasks, tmp_path):
+    r = auth_client.get(reverse("tasks:export"), {"format": "csv"})
+    path = tmp_path / "tasks.csv"
+    path.write_bytes(b"".join(r.streaming_content))
+    out = io.StringIO()
+    call_command("import_tasks", str(path), batch_size=1, stdout=out)
+    assert "Done: 2 tasks imported, 0 skipped" in out.getvalue()
+    copy = Task.objects.filter(name="First").order_by("-id").first()
+    assert copy.pk != labelled_tasks["t1"].pk
+    assert copy.executor.username == "user2"
+    assert sorted(copy.labels.values_list("name", flat=True)) == \
+        ["bug", "ui"]
+
+
+def test_import_tasks_ndjson_resolves_names(users, status_new, tmp_path):
+    path = tmp_path / "tasks.ndjson"
+    rows = [
+        {"name": "A", "status": "new", "labels": ["fresh"]},
+        {"name": "B", "status": "new", "author": "user2",
+         "executor": "nobody"},
+        {"name": "C", "status": "missing", "author": "user2"},
+    ]
+    path.write_text("\n".join(json.dumps(row) for row in rows))
+    err = io.StringIO()
+    call_command("import_tasks", str(path), author="user1",
+                 create_missing=True, stdout=io.StringIO(), stderr=err)
+    task = Task.objects.get(name="A")
+    assert task.author == users["u1"]
+    assert list(task.labels.values_list("name", flat=True)) == ["fresh"]
+    assert not Task.objects.filter(name="B").exists()
+    assert "unknown executor 'nobody'" in err.getvalue()
+    assert Status.objects.filter(name="missing").exists()
+
+
+def bulk_post(client, **data):
+    return client.post(reverse("tasks:bulk"),
+                       {f"bulk-{key}": value for key, value in data.items()})
+
+
+def test_task_list_renders_bulk_form(auth_client, labelled_tasks):
+    r = auth_client.get(reverse("tasks:index"), {"status": "", "sort": "id"})
+    html = r.content.decode()
+    assert 'name="bulk-query" value="status=&amp;sort=id"' in html
+    for field in ("action", "target", "status", "executor", "labels"):
+        assert f'name="bulk-{field}"' in html
+    assert 'name="bulk-tasks"' in html
+    assert 'name="-tasks"' not in html
+
+
+def test_bulk_set_status_on_selection(auth_client, labelled_tasks):
+    t1, done = labelled_tasks["t1"], labelled_tasks["done"]
+    with CaptureQueriesContext(connection) as ctx:
+        r = bulk_post(auth_client, action="set_status", target="selected",
+                      tasks=[t1.pk], status=done.pk)
+    assert r.status_code == 302
+    t1.refresh_from_db()
+    assert t1.status == done
+    assert any(q["sql"].startswith("UPDATE") for q in ctx.captured_queries)
+
+
+def test_bulk_actions_on_filter_result(auth_client, users, labelled_tasks):
+    done = labelled_tasks["done"]
+    feature = Label.objects.create(name="feature")
+    query = f"status={done.pk}"
+    bulk_post(auth_client, action="set_executor", target="filtered",
+              query=query, executor=users["u1"].pk)
+    bulk_post(auth_client, action="add_labels", target="filtered",
+              query=query, labels=[feature.pk])
+    t1, t2 = labelled_tasks["t1"], labelled_tasks["t2"]
+    t1.refresh_from_db()
+    t2.refresh_from_db()
+    assert t2.executor == users["u1"]
+    assert t1.executor == users["u2"]
+    assert list(t2.labels.values_list("name", flat=True)) == ["feature"]
+
+    bug = Label.objects.get(name="bug")
+    bulk_post(auth_client, action="remove_labels", target="filtered",
+              query=f"label={bug.pk}", labels=[bug.pk])
+    assert list(t1.labels.values_list("name", flat=True)) == ["ui"]
+
+
+def test_bulk_delete_only_own_tasks(auth_client, labelled_tasks):
+    t1, t2 = labelled_tasks["t1"], labelled_tasks["t2"]
+    r = bulk_post(auth_client, action="delete", target="filtered", query="")
+    assert r.status_code == 302
+    assert not Task.objects.filter(pk=t1.pk).exists()
+    assert not Task.labels.through.objects.filter(task_id=t1.pk).exists()
+    assert Task.objects.filter(pk=t2.pk).exists()
+
+
+def test_bulk_requires_selection(auth_client, labelled_tasks):
+    r = bulk_post(auth_client, action="delete", target="selected")
+    assert r.status_code == 302
+    assert Task.objects.count() == 2
+
+
+def search(client, **params):
+    r = client.get(reverse("tasks:index"), params)
+    return [t.name for t in r.context["tasks"]]
+
+
+def test_search_ranks_and_combines_with_filters(auth_client, users,
+                                                status_new):
+    done = Status.objects.create(name="done")
+    Task.objects.create(name="Fix login page", status=status_new,
+                        author=users["u1"])
+    Task.objects.create(name="Update docs", description="mention login",
+                        status=status_new, author=users["u1"])
+    Task.objects.create(name="Login audit", status=done, author=users["u2"])
+    Task.objects.create(name="Unrelated", status=status_new,
+                        author=users["u1"])
+    ranked = search(auth_client, q="login")
+    assert sorted(ranked[:2]) == ["Fix login page", "Login audit"]
+    assert ranked[2:] == ["Update docs"]
+    assert search(auth_client, q="log") == ranked
+    assert search(auth_client, q="login", status=done.pk) == ["Login audit"]
+    assert search(auth_client, q="login page") == ["Fix login page"]
+    assert search(auth_client, q="login", sort="-id") == [
+        "Login audit", "Update docs", "Fix login page"]
+
+
+def test_search_index_follows_writes(auth_client, users, status_new):
+    t = Task.objects.create(name="Alpha", status=status_new,
+                            author=users["u1"])
+    Task.objects.filter(pk=t.pk).update(name="Beta")
+    assert search(auth_client, q="alpha") == []
+    assert search(auth_client, q="beta") == ["Beta"]
+    Task.objects.bulk_create([Task(name="Beta two", status=status_new,
+                                   author=users["u1"])])
+    t.delete()
+    assert search(auth_client, q="beta") == ["Beta two"]
+
+
+def test_search_pages_by_rank(auth_client, users, status_new):
+    size = TaskListView.page_size
+    Task.objects.bulk_create(
+        Task(name=f"report {i}", status=status_new, author=users["u1"])
+        for i in range(size + 3)
+    )
+    r = auth_client.get(reverse("tasks:index"), {"q": "report"})
+    first = [t.pk for t in r.context["tasks"]]
+    r2 = auth_client.get(reverse("tasks:index") + r.context["next_url"])
+    second = [t.pk for t in r2.context["tasks"]]
+    assert len(first) == size
+    assert len(second) == 3
+    assert not set(first) & set(second)
+
+
+def test_counters_follow_task_writes(auth_client, users, labelled_tasks,
+                                     tmp_path):
+    t1, t2 = labelled_tasks["t1"], labelled_tasks["t2"]
+    done = labelled_tasks["done"]
+    assert counters.verify() == {}
+
+    auth_client.post(reverse("tasks:update", args=[t2.pk]), data={
+        "name": "Second", "status": labelled_tasks["done"].pk,
+        "executor": users["u1"].pk,
+        "labels": [Label.objects.get(name="bug").pk],
+    })
+    t1.labels.remove(Label.objects.get(name="ui"), done.pk + 100)
+    Label.objects.get(name="ui").labeled_tasks.add(t1, t2)
+    t2.labels.clear()
+    assert counters.verify() == {}
+
+    bulk_post(auth_client, action="set_status", target="filtered",
+              query="", status=done.pk)
+    bulk_post(auth_client, action="add_labels", target="filtered",
+              query="", labels=[Label.objects.get(name="bug").pk])
+    bulk_post(auth_client, action="remove_labels", target="selected",
+              tasks=[t1.pk], labels=[Label.objects.get(name="ui").pk])
+    assert counters.verify() == {}
+
+    path = tmp_path / "tasks.ndjson"
+    path.write_text(json.dumps({"name": "Imported", "status": "new",
+                                "author": "user2", "labels": ["bug"]}))
+    call_command("import_tasks", str(path), stdout=io.StringIO())
+    bulk_post(auth_client, action="delete", target="filtered", query="")
+    auth_client.post(reverse("tasks:delete", args=[t2.pk]))
+    assert counters.verify() == {}
+
+
+def test_counters_survive_overlapping_edits(labelled_tasks):
+    done = labelled_tasks["done"]
+    other = Status.objects.create(name="other")
+    first = Task.objects.get(pk=labelled_tasks["t1"].pk)
+    second = Task.objects.get(pk=labelled_tasks["t1"].pk)
+    first.status = done
+    first.save()
+    second.status = other
+    second.save()
+    stale = Task.objects.get(pk=labelled_tasks["t2"].pk)
+    Task.objects.get(pk=stale.pk).delete()
+    stale.delete()
+    assert counters.verify() == {}
+
+
+def test_counter_updates_in_key_order(db):
+    deltas = collections.Counter({(TaskCounter.STATUS, 2, 0): 1,
+                                  (TaskCounter.STATUS, 1, 0): -1,
+                                  (TaskCounter.EXECUTOR, 5, 0): 1})
+    with CaptureQueriesContext(connection) as ctx:
+        counters.apply(deltas)
+    updates = [q["sql"] for q in ctx.captured_queries
+               if q["sql"].startswith("UPDATE")]
+    keys = [(TaskCounter.EXECUTOR, 5), (TaskCounter.STATUS, 1),
+            (TaskCounter.STATUS, 2)]
+    assert len(updates) == 3
+    for sql, (dimension, key) in zip(updates, sorted(keys)):
+        assert f"'{dimension}'" in sql and f'"key" = {key}' in sql
+
+
+def test_dashboard_reads_counters(auth_client, users, labelled_tasks):
+    with CaptureQueriesContext(connection) as ctx:
+        r = auth_client.get(reverse("home"))
+    assert not any("tasks_task" in q["sql"].replace("tasks_taskcounter", "")
+                   for q in ctx.captured_queries)
+    dashboard = r.context["dashboard"]
+    assert dashboard["total"] == 2
+    assert dashboard["mine_total"] == 0
+    assert ("user2", 1) in dashboard["by_executor"]
+    assert [(str(label), n) for label, n in dashboard["by_label"]] == [
+        ("bug", 1), ("ui", 1)]
+
+
+def test_task_counters_command(labelled_tasks):
+    TaskCounter.objects.filter(dimension=TaskCounter.TOTAL).update(count=7)
+    with pytest.raises(CommandError):
+        call_command("task_counters", "verify", stdout=io.StringIO())
+    call_command("task_counters", "rebuild", stdout=io.StringIO())
+    out = io.StringIO()
+    call_command("task_counters", "verify", stdout=out)
+    assert "accurate" in out.getvalue()
+
+
+def call_async_view(view, user, path="/", **kwargs):
+    request = RequestFactory().get(path)
+
+    async def auser():
+        return user
+
+    request.auser = auser
+    request.session = {}
+    response = async_to_sync(view.as_view())(request, **kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    return response
+
+
+def test_async_task_list(users, many_tasks):
+    r = call_async_view(AsyncTaskListView, users["u1"], "/tasks/?sort=-id")
+    assert r.status_code == 200
+    assert r.context_data["page"].has_next
+    assert r.context_data["page"].object_list[0].name == "Task 104"
+    cursor = r.context_data["page"].next_cursor
+    r = call_async_view(AsyncTaskListView, users["u1"],
+                        f"/tasks/?sort=-id&cursor={cursor}")
+    assert r.context_data["page"].object_list[0].name == "Task 054"
+    assert r.context_data["page"].has_previous
+
+
+def test_async_task_list_filters_and_invalid_cursor(users, labelled_tasks):
+    r = call_async_view(AsyncTaskListView, users["u1"],
+                        f"/tasks/?executor={users['u2'].pk}")
+    assert [t.name for t in r.context_data["page"]] == ["First"]
+    with pytest.raises(Http404):
+        call_async_view(AsyncTaskListView, users["u1"], "/tasks/?cursor=x")
+
+
+def test_async_task_detail(users, labelled_tasks):
+    task = Task.objects.get(name="First")
+    r = call_async_view(AsyncTaskDetailView, users["u1"], pk=task.pk)
+    assert r.status_code == 200
+    assert "First" in r.content.decode()
+    with pytest.raises(Http404):
+        call_async_view(AsyncTaskDetailView, users["u1"], pk=0)
+
+
+def test_async_views_require_login(labelled_tasks):
+    r = call_async_view(AsyncTaskListView, AnonymousUser(), "/tasks/")
+    assert r.status_code == 302
+    assert "/login/" in r.url
+
+
+def conditional_get(client, url):
+    client.get(url)  # picks up the CSRF cookie, which is part of the key
+    first = client.get(url)
+    with CaptureQueriesContext(connection) as ctx:
+        second = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    return first, second, ctx.captured_queries
+
+
+def test_task_list_not_modified(auth_client, labelled_tasks):
+    url = reverse("tasks:index") + "?status=" + str(labelled_tasks["done"].pk)
+    first, second, queries = conditional_get(auth_client, url)
+    assert first.status_code == 200
+    assert first["ETag"].startswith('W/"')
+    assert "Last-Modified" in first
+    assert second.status_code == 304
+    assert second["ETag"] == first["ETag"]
+    assert not any('"tasks_task"' in q["sql"] for q in queries)
+    other = auth_client.get(reverse("tasks:index"))
+    assert other["ETag"] != first["ETag"]
+    client = Client()
+    client.force_login(User.objects.get(username="user2"))
+    assert client.get(url).get("ETag") != first["ETag"]
+
+
+def test_task_list_etag_changes_on_write(auth_client, users, labelled_tasks):
+    url = reverse("tasks:index")
+    etag = conditional_get(auth_client, url)[0]["ETag"]
+    bulk_post(auth_client, action="set_status", target="filtered", query="",
+              status=labelled_tasks["done"].pk)
+    # The flash message is rendered instead of being hidden by a 304.
+    r = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+    assert "ETag" not in r
+    r = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+    etag = r["ETag"]
+    labelled_tasks["done"].name = "finished"
+    labelled_tasks["done"].save()
+    assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_task_detail_not_modified(auth_client, labelled_tasks):
+    task = labelled_tasks["t2"]
+    url = reverse("tasks:detail", args=[task.pk])
+    first, second, queries = conditional_get(auth_client, url)
+    assert second.status_code == 304
+    assert len(queries) <= 4  # session, user, task stamp, collections
+    task.labels.add(Label.objects.get(name="bug"))
+    r = auth_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert r.status_code == 200
+    assert auth_client.get(reverse("tasks:detail", args=[0])).status_code \
+        == 404
+
+
+def test_async_task_list_not_modified(users, labelled_tasks):
+    first = call_async_view(AsyncTaskListView, users["u1"], "/tasks/")
+    request_etag = first["ETag"]
+    request = RequestFactory().get("/tasks/", HTTP_IF_NONE_MATCH=request_etag)
+
+    async def auser():
+        return users["u1"]
+
+    request.auser = auser
+    response = async_to_sync(AsyncTaskListView.as_view())(request)
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize("method, name, data", [
+    ("get", "tasks:index", None),
+    ("get", "tasks:index", {"status": "status", "executor": "user",
+                            "label": "label", "q": "seeded"}),
+    ("get", "tasks:detail", None),
+    ("get", "tasks:create", None),
+    ("post", "tasks:create", {"name": "New", "status": "status",
+                              "executor": "user", "labels": "label"}),
+    ("get", "tasks:update", None),
+    ("post", "tasks:update", {"name": "Renamed", "status": "status",
+                              "labels": "label"}),
+    ("get", "tasks:delete", None),
+    ("post", "tasks:delete", None),
+    ("get", "tasks:autocomplete_executors", {"q": "se"}),
+    ("get", "tasks:autocomplete_labels", {"q": "la"}),
+    ("get", "home", None),
+])
+def test_views_within_query_budget(seeded, assert_query_budget, method, name,
+                                   data):
+    args = [seeded["task"].pk] if name in (
+        "tasks:detail", "tasks:update", "tasks:delete") else []
+    data = {key: seeded[value].pk if value in seeded else value
+            for key, value in (data or {}).items()}
+    assert_query_budget(seeded["client"], reverse(name, args=args),
+                        method, data)
+
+
+def seeded_tasks(prefix):
+    tasks = (Task.objects.filter(author__username__startswith=prefix)
+             .select_related("author", "executor", "status")
+             .prefetch_related("labels"))
+    return [(task.name, task.author.username[len(prefix):],
+             task.executor and task.executor.username[len(prefix):],
+             task.status.name[len(prefix):],
+             sorted(label.name[len(prefix):] for label in task.labels.all()))
+            for task in tasks]
+
+
+def test_seed_scale(db):
+    options = {"users": 20, "tasks": 500, "labels": 15, "statuses": 4,
+               "batch_size": 128, "seed": 7, "stdout": io.StringIO()}
+    call_command("seed_scale", prefix="a", **options)
+    call_command("seed_scale", prefix="b", **options)
+
+    tasks = seeded_tasks("a")
+    assert len(tasks) == 500
+    assert tasks == seeded_tasks("b")
+    assert counters.verify() == {}
+    executors = collections.Counter(executor for _, _, executor, _, _
+                                    in tasks if executor)
+    top_three = sum(n for _, n in executors.most_common(3))
+    assert top_three > sum(executors.values()) / 2
+    assert any(len(labels) > 1 for *_, labels in tasks)
+
+    with pytest.raises(CommandError):
+        call_command("seed_scale", prefix="a", **options)
+
+
+def test_seed_scale_without_labels(db):
+    call_command("seed_scale", prefix="n", users=5, tasks=10, labels=0,
+                 statuses=2, stdout=io.StringIO())
+    tasks = seeded_tasks("n")
+    assert len(tasks) == 10
+    assert not any(labels for *_, labels in tasks)
+    assert counters.verify() == {}
@@ -1,19 +1,36 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import (
+    AsyncTaskDetailView,
+    AsyncTaskListView,
+    ExecutorAutocompleteView,
+    LabelAutocompleteView,
+    TaskBulkActionView,
     TaskCreateView,
     TaskDeleteView,
     TaskDetailView,
+    TaskExportView,
     TaskListView,
     TaskUpdateView,
 )
 
 app_name = "tasks"
 
+
+list_view = AsyncTaskListView if settings.ASYNC_VIEWS else TaskListView
+detail_view = AsyncTaskDetailView if settings.ASYNC_VIEWS else TaskDetailView
+
 urlpatterns = [
-    path("", TaskListView.as_view(), name="index"),
+    path("", list_view.as_view(), name="index"),
     path("create/", TaskCreateView.as_view(), name="create"),
-    path("<int:pk>/", TaskDetailView.as_view(), name="detail"),
+    path("export/", TaskExportView.as_view(), name="export"),
+    path("bulk/", TaskBulkActionView.as_view(), name="bulk"),
+    path("<int:pk>/", detail_view.as_view(), name="detail"),
     path("<int:pk>/update/", TaskUpdateView.as_view(), name="update"),
     path("<int:pk>/delete/", TaskDeleteView.as_view(), name="delete"),
+    path("autocomplete/executors/", ExecutorAutocompleteView.as_view(),
+         name="autocomplete_executors"),
+    path("autocomplete/labels/", LabelAutocompleteView.as_view(),
+         name="autocomplete_labels"),
 ]
@@ -1,36 +1,245 @@
+import heapq
+import string
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
+from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.http import (
+    Http404,
+    HttpResponseBadRequest,
+    JsonResponse,
+    QueryDict,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.views import View
 from django.views.generic import CreateView, DeleteView, DetailView, UpdateView
 from django_filters.views import FilterView
 
+from task_manager.labels.models import Label
+from task_manager.users.mixins import AsyncLoginRequiredMixin
+from task_manager.users.utils import format_user_display
+
+from . import bulk
+from .export import FORMATS as EXPORT_FORMATS
 from .filters import TaskFilter
-from .models import Task
-from .forms import TaskForm
+from .models import CollectionVersion, Task
+from .search import rank_tasks
+from .forms import TaskBulkActionForm, TaskForm
+from .pagination import (
+    InvalidCursor,
+    KeysetPaginator,
+    decode_cursor,
+    encode_cursor,
+)
+from .versions import ConditionalGetMixin
+
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
 
 
-class TaskListView(LoginRequiredMixin, FilterView):
+class TaskListView(LoginRequiredMixin, ConditionalGetMixin, FilterView):
     model = Task
     template_name = "tasks/index.html"
     context_object_name = "tasks"
     login_url = "login"
     filterset_class = TaskFilter
+    collections = [CollectionVersion.TASKS, CollectionVersion.STATUSES,
+                   CollectionVersion.LABELS, CollectionVersion.USERS]
+    page_size = 50
+    sort_orders = {
+        "rank": "Relevance",
+        "id": "ID",
+        "-id": "ID (newest first)",
+        "name": "Name",
+        "-name": "Name (Z-A)",
+        "created_at": "Created at",
+        "-created_at": "Created at (newest first)",
+    }
+    query_budget = 10
 
     def get_queryset(self):
         return (
             super().get_queryset()
             .select_related("status", "author", "executor")
             .prefetch_related("labels")
-            .order_by("id")
         )
 
+    def get_sort(self):
+        sort = self.request.GET.get("sort")
+        searching = bool(self.request.GET.get("q", "").strip())
+        if sort == "rank" or (not sort and searching):
+            return "rank" if searching else "id"
+        return sort if sort in self.sort_orders else "id"
+
+    def get_page_url(self, cursor):
+        params = self.request.GET.copy()
+        params["cursor"] = cursor
+        return f"?{params.urlencode()}"
+
+    def get_paginator(self, object_list):
+        sort = self.get_sort()
+        if sort == "rank":
+            object_list = rank_tasks(object_list, self.request.GET["q"])
+        return KeysetPaginator(object_list, [sort], self.page_size)
+
+    def get_context_data(self, *, page=None, **kwargs):
+        if page is None:
+            paginator = self.get_paginator(
+                kwargs.get("object_list", self.object_list))
+            try:
+                page = paginator.page(self.request.GET.get("cursor"))
+            except InvalidCursor:
+                raise Http404("Invalid page cursor")
+        kwargs["object_list"] = page.object_list
+        context = super().get_context_data(**kwargs)
+        context["page"] = page
+        context["sort"] = self.get_sort()
+        context["sort_orders"] = self.sort_orders
+        export_params = self.request.GET.copy()
+        for param in ("cursor", "sort", "format"):
+            export_params.pop(param, None)
+        context["export_query"] = export_params.urlencode()
+        context["bulk_form"] = TaskBulkActionForm(
+            initial={"query": self.request.GET.urlencode()})
+        if page.has_next:
+            context["next_url"] = self.get_page_url(page.next_cursor)
+        if page.has_previous:
+            context["previous_url"] = self.get_page_url(page.previous_cursor)
+        return context
+
+
+class AsyncTaskListView(AsyncLoginRequiredMixin, TaskListView):
+    def filter_object_list(self):
+        self.filterset = self.get_filterset(self.get_filterset_class())
+        if (not self.filterset.is_bound or self.filterset.is_valid()
+                or not self.get_strict()):
+            return self.filterset.qs
+        return self.filterset.queryset.none()
+
+    def get_response(self, page):
+        context = self.get_context_data(filter=self.filterset,
+                                        object_list=self.object_list,
+                                        page=page)
+        return self.render_to_response(context)
+
+    async def get(self, request, *args, **kwargs):
+        # Building and validating the filter may hit the database
+        # (choice lists, ModelChoiceFilter lookups), so it runs off-loop.
+        self.object_list = await sync_to_async(self.filter_object_list)()
+        paginator = self.get_paginator(self.object_list)
+        try:
+            page = await paginator.apage(request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Invalid page cursor")
+        return await sync_to_async(self.get_response)(page)
+
+
+class TaskExportView(LoginRequiredMixin, View):
+    login_url = "login"
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest("Unknown export format")
+        filterset = TaskFilter(request.GET, queryset=Task.objects.all(),
+                               request=request)
+        if not filterset.is_valid():
+            return HttpResponseBadRequest("Invalid filter parameters")
+        stream, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(stream(filterset.qs),
+                                         content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="tasks.{export_format}"')
+        return response
+
+
+class TaskBulkActionView(LoginRequiredMixin, View):
+    login_url = "login"
+
+    def post(self, request, *args, **kwargs):
+        form = TaskBulkActionForm(request.POST)
+        query = request.POST.get(form.add_prefix("query"), "")
+        redirect_url = reverse("tasks:index") + (f"?{query}" if query
+                                                 else "")
+        if not form.is_valid():
+            for errors in form.errors.values():
+                messages.error(request, " ".join(errors))
+            return redirect(redirect_url)
+
+        data = form.cleaned_data
+        if data["target"] == "filtered":
+            filterset = TaskFilter(QueryDict(data["query"]),
+                                   queryset=Task.objects.all(),
+                                   request=request)
+            if not filterset.is_valid():
+                messages.error(request, "Invalid filter parameters")
+                return redirect(redirect_url)
+            queryset = filterset.qs
+        else:
+            queryset = Task.objects.filter(
+                pk__in=[task.pk for task in data["tasks"]])
+
+        action = data["action"]
+        if action == "delete":
+            count = bulk.delete_tasks(queryset, request.user)
+            messages.success(
+                request,
+                f"Deleted {count} task(s); only the author can delete "
+                "a task, others were left untouched")
+            return redirect(redirect_url)
+        if action == "set_status":
+            count = bulk.set_status(queryset, data["status"])
+            message = f"Status set on {count} task(s)"
+        elif action == "set_executor":
+            count = bulk.set_executor(queryset, data["executor"])
+            message = f"Executor set on {count} task(s)"
+        elif action == "add_labels":
+            count = bulk.add_labels(queryset, data["labels"])
+            message = f"Labels added to {count} task(s)"
+        else:
+            count = bulk.remove_labels(queryset, data["labels"])
+            message = f"Removed {count} label assignment(s)"
+        messages.success(request, message)
+        return redirect(redirect_url)
 
-class TaskDetailView(LoginRequiredMixin, DetailView):
+
+class TaskDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     model = Task
     template_name = "tasks/detail.html"
     context_object_name = "task"
     login_url = "login"
+    collections = [CollectionVersion.STATUSES, CollectionVersion.LABELS,
+                   CollectionVersion.USERS]
+    query_budget = 6
+
+    def get_validator_parts(self):
+        updated_at = (Task.objects.filter(pk=self.kwargs["pk"])
+                      .values_list("updated_at", flat=True).first())
+        if updated_at is None:
+            return None
+        parts, last_modified = super().get_validator_parts()
+        return ([*parts, updated_at],
+                max(filter(None, [last_modified, updated_at])))
+
+    def get_queryset(self):
+        return (super().get_queryset()
+                .select_related("status", "author", "executor")
+                .prefetch_related("labels"))
+
+
+class AsyncTaskDetailView(AsyncLoginRequiredMixin, TaskDetailView):
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.object = await self.get_queryset().aget(pk=kwargs["pk"])
+        except Task.DoesNotExist:
+            raise Http404("No task found matching the query")
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
 
 
 class TaskCreateView(LoginRequiredMixin, CreateView):
@@ -39,6 +248,13 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
     template_name = "tasks/form.html"
     success_url = reverse_lazy("tasks:index")
     login_url = "login"
+    # Session and user (2), status choices (1), form lookups of status,
+    # executor and labels (3), model validation re-checking status and
+    # executor (2); in a savepoint (2): INSERT and version bump (2), four
+    # counter rows (4), three more to create a first-seen counter row
+    # (3); then per label set: link check, INSERT, version touch and bump
+    # (4) and its counter row (1). The budget test sends one label.
+    query_budget = 24
 
     def form_valid(self, form):
         form.instance.author = self.request.user
@@ -52,6 +268,13 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "tasks/form.html"
     success_url = reverse_lazy("tasks:index")
     login_url = "login"
+    # Session and user (2), the task and its labels (2), status choices
+    # (1), form lookups of status and labels (2) and the status re-check
+    # (1); in a savepoint (2): the locked read of the stored status and
+    # executor (1), UPDATE and version bump (2), then moving to another
+    # executor changes four counter rows (4), two of them first seen
+    # (2 x 3); finally set() reads the current labels (1).
+    query_budget = 24
 
     def form_valid(self, form):
         messages.success(self.request, "Task updated successfully")
@@ -63,6 +286,18 @@ class TaskDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     template_name = "tasks/confirm_delete.html"
     success_url = reverse_lazy("tasks:index")
     login_url = "login"
+    # Session and user (2), the task, loaded once (1); in a savepoint
+    # (2): the locked read of its stored status and executor (1), its
+    # labels for the counters (1), DELETE of links and task (2), version
+    # bump (1), four task counter rows (4) and one per label (1 in the
+    # budget test).
+    query_budget = 15
+
+    def get_object(self, queryset=None):
+        # test_func() and DeleteView both ask for the object.
+        if not hasattr(self, "_object"):
+            self._object = super().get_object(queryset)
+        return self._object
 
     def test_func(self):
         return self.get_object().author_id == self.request.user.id
@@ -76,3 +311,136 @@ class TaskDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     def post(self, request, *args, **kwargs):
         messages.success(self.request, "Task deleted successfully")
         return super().post(request, *args, **kwargs)
+
+
+class AutocompleteView(LoginRequiredMixin, View):
+    """JSON prefix search used by the executor and label pickers.
+
+    Each search field has a ``(LOWER(field), id)`` index. A search runs
+    one range scan per field and casing of the term, ordered by that
+    index, and merges them, so a page reads about one page of rows however
+    short the prefix. Pages are keyed on ``(LOWER(field), id)``; a row
+    matching through several fields comes at its smallest key.
+    """
+    login_url = "login"
+    queryset = None
+    search_fields = ()
+    page_size = 20
+    max_page_size = 50
+    # Session and user (2), one range scan per search field and casing of
+    # the term (1 for labels and an ASCII term).
+    query_budget = 3
+
+    def get_label(self, obj):
+        return str(obj)
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get("limit", self.page_size))
+        except ValueError:
+            limit = self.page_size
+        return max(1, min(limit, self.max_page_size))
+
+    def get_prefixes(self, queryset, term):
+        if connections[queryset.db].vendor != "sqlite":
+            return [term.lower()]
+        # SQLite's LOWER() only folds ASCII: "Фикс" stays "Фикс". Try the
+        # usual casings of the term, folded the same way.
+        return sorted({variant.translate(ASCII_LOWER) for variant in
+                       (term.lower(), term.capitalize(), term.upper())})
+
+    def scan(self, queryset, alias, prefix, after, chunk_size):
+        """Yield ``(key, id), obj`` for ``prefix`` matches past ``after``."""
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        queryset = (queryset.filter(**{f"{alias}__gte": prefix,
+                                       f"{alias}__lt": upper})
+                    .order_by(alias, "id"))
+        while True:
+            page = queryset
+            if after is not None:
+                key, pk = after
+                page = page.filter(Q(**{f"{alias}__gte": key}),
+                                   Q(**{f"{alias}__gt": key}) | Q(id__gt=pk))
+            chunk = list(page[:chunk_size])
+            for obj in chunk:
+                yield (getattr(obj, alias), obj.pk), obj
+            if len(chunk) < chunk_size:
+                return
+            after = (getattr(chunk[-1], alias), chunk[-1].pk)
+
+    def search(self, term, after, limit):
+        """Return up to ``limit`` ``(key, obj)`` matches past ``after``."""
+        aliases = {field: f"{field}_lower" for field in self.search_fields}
+        queryset = self.queryset.annotate(
+            **{alias: Lower(field) for field, alias in aliases.items()})
+        scans = [(alias, prefix) for alias in aliases.values()
+                 for prefix in self.get_prefixes(queryset, term)]
+
+        def first_scan(obj):
+            # The scan that owns obj: the one where it has the smallest key.
+            return min((getattr(obj, alias), index)
+                       for index, (alias, prefix) in enumerate(scans)
+                       if (getattr(obj, alias) or "").startswith(prefix))
+
+        def tagged(index, alias, prefix):
+            for row, obj in self.scan(queryset, alias, prefix, after, limit):
+                yield row, index, obj
+
+        merged = heapq.merge(*(tagged(index, *scan)
+                               for index, scan in enumerate(scans)),
+                             key=lambda item: item[:2])
+        results = []
+        for (key, pk), index, obj in merged:
+            if first_scan(obj) == (key, index):
+                results.append(((key, pk), obj))
+                if len(results) == limit:
+                    break
+        return results
+
+    def get_after(self):
+        cursor = self.request.GET.get("cursor")
+        if not cursor:
+            return None
+        values, _ = decode_cursor(cursor)
+        if (len(values) != 2 or not isinstance(values[0], str)
+                or not isinstance(values[1], int)):
+            raise InvalidCursor(cursor)
+        return tuple(values)
+
+    def get(self, request, *args, **kwargs):
+        term = request.GET.get("q", "").strip()
+        limit = self.get_limit()
+        try:
+            if term:
+                rows = self.search(term, self.get_after(), limit + 1)
+                objects = [obj for _, obj in rows[:limit]]
+                next_cursor = (encode_cursor(list(rows[limit - 1][0]))
+                               if len(rows) > limit else None)
+            else:
+                paginator = KeysetPaginator(self.queryset.all(), ["id"],
+                                            limit)
+                page = paginator.page(request.GET.get("cursor"))
+                objects, next_cursor = page.object_list, page.next_cursor
+        except InvalidCursor:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+        return JsonResponse({
+            "results": [{"id": obj.pk, "text": self.get_label(obj)}
+                        for obj in objects],
+            "next": next_cursor,
+        })
+
+
+class ExecutorAutocompleteView(AutocompleteView):
+    queryset = get_user_model().objects.only(
+        "id", "username", "first_name", "last_name")
+    search_fields = ("username", "first_name", "last_name")
+    # Session and user (2), a range scan per field (3) for an ASCII term.
+    query_budget = 5
+
+    def get_label(self, obj):
+        return format_user_display(obj)
+
+
+class LabelAutocompleteView(AutocompleteView):
+    queryset = Label.objects.only("id", "name")
+    search_fields = ("name",)
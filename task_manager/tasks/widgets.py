@@ -0,0 +1,53 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+class AutocompleteMixin:
+    """Render only the selected options of a model choice field.
+
+    The rest are fetched by the browser from ``url`` as the user types, so
+    the page does not grow with the number of rows in the table.
+    """
+
+    def __init__(self, url, attrs=None):
+        self.url = url
+        super().__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["attrs"]["data-autocomplete-url"] = reverse(
+            self.url)
+        return context
+
+    def get_selected_choices(self, value):
+        selected = [v for v in value if v]
+        if not selected:
+            return []
+        iterator = self.choices
+        try:
+            objects = list(iterator.queryset.filter(pk__in=selected))
+        except (ValueError, ValidationError):
+            return []
+        return [(obj.pk, iterator.field.label_from_instance(obj))
+                for obj in objects]
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.get_selected_choices(value)
+        empty_label = getattr(self.choices.field, "empty_label", None)
+        if empty_label is not None:
+            choices.insert(0, ("", empty_label))
+        return [
+            (None, [self.create_option(name, option_value, label,
+                                       str(option_value) in value, index,
+                                       attrs=attrs)], index)
+            for index, (option_value, label) in enumerate(choices)
+        ]
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
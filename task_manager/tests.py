@@ -0,0 +1,437 @@
+import io
+import json
+import multiprocessing
+import sqlite3
+import threading
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connection, router
+from django.http import HttpResponse
+from django.template.loader import get_template
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from task_manager import reporting, warmup
+from task_manager.benchmark import compare
+from task_manager.db_router import ReplicaMiddleware
+from task_manager.labels.models import Label
+from task_manager.metrics import Registry, registry
+from task_manager.reporting import RollbarMiddleware
+from task_manager.shared_cache import WAYS, SharedMemoryCache
+from task_manager.slowlog import explain, fingerprint
+from task_manager.statuses.models import Status
+from task_manager.tasks.management.commands.startup_profile import (
+    aggregate,
+    parse_importtime,
+)
+from task_manager.tasks.management.commands.sync_replicas import copy_sqlite
+from task_manager.tasks.models import Task
+from task_manager.tasks.views import TaskListView
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def users(db):
+    pwd = "p12345678"
+    u1 = User.objects.create_user(username="user1", password=pwd)
+    u2 = User.objects.create_user(username="user2", password=pwd)
+    return {"u1": u1, "u2": u2, "pwd": pwd}
+
+
+@pytest.fixture
+def auth_client(users):
+    c = Client()
+    c.login(username="user1", password=users["pwd"])
+    return c
+
+
+@pytest.fixture
+def status_new(db):
+    return Status.objects.create(name="new")
+
+
+@pytest.fixture
+def labelled_tasks(users, status_new):
+    bug = Label.objects.create(name="bug")
+    ui = Label.objects.create(name="ui")
+    done = Status.objects.create(name="done")
+    t1 = Task.objects.create(name="First", status=status_new,
+                             author=users["u1"], executor=users["u2"])
+    t1.labels.add(bug, ui)
+    t2 = Task.objects.create(name="Second", description="multi\nline",
+                             status=done, author=users["u2"])
+    return {"t1": t1, "t2": t2, "done": done}
+
+
+def test_query_budget_middleware_logs_views(settings, caplog, monkeypatch,
+                                            users, labelled_tasks):
+    settings.QUERY_BUDGET_LOG = True
+    client = Client()
+    client.force_login(users["u1"])
+    with caplog.at_level("INFO", logger="task_manager.instrumentation"):
+        client.get(reverse("tasks:detail", args=[labelled_tasks["t1"].pk]))
+    [record] = caplog.records
+    assert record.levelname == "INFO"
+    assert "TaskDetailView" in record.getMessage()
+    assert "(budget 6)" in record.getMessage()
+    monkeypatch.setattr(TaskListView, "query_budget", 0)
+    with caplog.at_level("INFO", logger="task_manager.instrumentation"):
+        client.get(reverse("tasks:index"))
+    assert caplog.records[-1].levelname == "WARNING"
+
+
+def test_server_timing(settings, caplog, users, labelled_tasks):
+    assert "Server-Timing" not in Client().get(reverse("login"))
+    settings.SERVER_TIMING = True
+    client = Client()
+    client.force_login(users["u1"])
+    with caplog.at_level("INFO", logger="task_manager.timing"):
+        r = client.get(reverse("tasks:index"))
+    metrics = dict(metric.split(";", 1)
+                   for metric in r["Server-Timing"].split(", "))
+    assert list(metrics) == ["req", "view", "tpl", "resp", "db", "total",
+                             "queries"]
+    assert float(metrics["tpl"].removeprefix("dur=")) > 0
+    [record] = caplog.records
+    assert record.path == "/tasks/"
+    assert record.timing["total"] >= record.timing["tpl"]
+    assert record.queries > 0
+
+
+def test_metrics_registry_merges_processes(tmp_path):
+    first, second = Registry(tmp_path), Registry(tmp_path)
+    labels = (("view", "tasks:index"), ("method", "GET"))
+    first.inc("http_requests_total", labels + (("status", "200"),))
+    second.inc("http_requests_total", labels + (("status", "200"),), 2)
+    first.observe("http_request_duration_seconds", labels, 0.003)
+    second.observe("http_request_duration_seconds", labels, 0.2)
+    second.flush()
+    text = first.render()
+    assert ('http_requests_total{view="tasks:index",method="GET",'
+            'status="200"} 3') in text
+    assert ('http_request_duration_seconds_bucket{view="tasks:index",'
+            'method="GET",le="0.005"} 1') in text
+    assert ('http_request_duration_seconds_bucket{view="tasks:index",'
+            'method="GET",le="+Inf"} 2') in text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+
+
+def test_metrics_folds_exited_processes(tmp_path):
+    live, dead = Registry(tmp_path), Registry(tmp_path)
+    labels = (("cache", "choices"), ("result", "hit"))
+    live.inc("cache_requests_total", labels)
+    dead.inc("cache_requests_total", labels, 2)
+    dead.flush()
+    live.remove_process(dead.path.name.split("-")[0])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["exited.json"]
+    assert live.collect()[("cache_requests_total", labels)] == 3
+    # Read before it was folded in: counted once.
+    dead.flush()
+    assert live.collect()[("cache_requests_total", labels)] == 3
+
+
+def test_metrics_endpoint(settings, auth_client, labelled_tasks):
+    assert auth_client.get("/metrics").status_code == 404
+    settings.METRICS_ENABLED = True
+    settings.METRICS_TOKEN = "secret"
+    client = Client()
+    client.force_login(User.objects.get(username="user1"))
+    client.get(reverse("tasks:index"))
+    client.get(reverse("tasks:detail", args=[labelled_tasks["t1"].pk]))
+    assert client.get("/metrics").status_code == 403
+    r = client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+    text = r.content.decode()
+    assert r["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{view="tasks:detail",method="GET",' \
+           'status="200"}' in text
+    assert 'db_queries_total{view="tasks:index"}' in text
+    assert 'cache_requests_total{cache="choices",result=' in text
+
+
+def test_slow_query_fingerprint():
+    a = fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s) AND x = 5')
+    b = fingerprint('SELECT * FROM  "t" WHERE "id" IN (%s) AND x = 7')
+    assert a == b
+    assert a[1] == 'SELECT * FROM "t" WHERE "id" IN (...) AND x = ?'
+
+
+def test_slow_query_log(settings, tmp_path, users, labelled_tasks):
+    log = tmp_path / "slow.jsonl"
+    settings.SLOW_QUERY_MS = 0
+    settings.SLOW_QUERY_LOG = str(log)
+    client = Client()
+    client.force_login(users["u1"])
+    client.get(reverse("tasks:index"),
+               {"status": labelled_tasks["done"].pk, "executor": ""})
+    entries = [json.loads(line) for line in log.read_text().splitlines()]
+    [entry] = [e for e in entries if e["sql"].startswith(
+        'SELECT "tasks_task"."id"') and "LIMIT" in e["sql"]]
+    assert entry["url_name"] == "tasks:index"
+    assert entry["view"] == "TaskListView"
+    assert entry["filters"] == ["status"]
+    assert any("INDEX" in step for step in entry["plan"])
+
+    settings.SLOW_QUERY_MS = None
+    out = io.StringIO()
+    call_command("slow_queries", "--url-name", "tasks:index", "--plans",
+                 stdout=out)
+    assert entry["fingerprint"] in out.getvalue()
+    assert "tasks:index [status]" in out.getvalue()
+    assert "USING INDEX" in out.getvalue()
+
+
+def test_slow_query_explain_failure_keeps_transaction(db):
+    with CaptureQueriesContext(connection) as ctx:
+        plan = explain(connection, "SELECT missing FROM nowhere", ())
+    assert plan.startswith("EXPLAIN failed")
+    assert any(q["sql"].startswith("SAVEPOINT") for q in ctx.captured_queries)
+    assert not connection.needs_rollback
+    assert Task.objects.count() == 0
+
+
+def test_benchmark_compare():
+    result = {"p95_ms": 10.0, "peak_kib": 100.0, "queries": 5}
+    baseline = {"results": {"a": result, "b": result}}
+    report = {"results": {
+        "a": {**result, "p95_ms": 12.0},
+        "b": {**result, "peak_kib": 200.0, "queries": 6},
+        "new": result,
+    }}
+    assert compare(report, baseline) == [
+        "b: 5 -> 6 queries", "b: peak_kib 100.0 -> 200.0"]
+
+
+def shared_cache_increments(path, n):
+    cache = SharedMemoryCache(path, {"OPTIONS": {"SIZE": 1 << 20}})
+    for _ in range(n):
+        cache.incr("counter")
+
+
+def test_shared_cache(tmp_path):
+    path = str(tmp_path / "cache")
+    cache = SharedMemoryCache(path, {"OPTIONS": {"SIZE": 1 << 20}})
+    cache.set("small", {"a": 1})
+    cache.set("large", "x" * 10000)
+    cache.set("too_large", "x" * (1 << 19))
+    assert cache.get("small") == {"a": 1}
+    assert cache.get("large") == "x" * 10000
+    assert cache.get("too_large") is None
+    assert not cache.add("small", 2)
+    cache.set("small", "moved to a bigger slot " * 100)
+    assert cache.get("small").startswith("moved")
+    cache.set("expired", 1, timeout=-1)
+    assert not cache.has_key("expired")
+    assert cache.delete("small") and cache.get("small") is None
+
+    # Another process sees the same entries, and increments are atomic.
+    cache.set("counter", 0)
+    workers = [multiprocessing.get_context("fork").Process(
+        target=shared_cache_increments, args=(path, 200)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    shared_cache_increments(path, 200)
+    for worker in workers:
+        worker.join()
+    assert cache.get("counter") == 800
+
+
+def test_shared_cache_evicts_least_recently_used(tmp_path):
+    # One set per size class: the ninth small key evicts the oldest.
+    cache = SharedMemoryCache(str(tmp_path / "cache"), {"OPTIONS": {
+        "SIZE": 1, "SLOT_SIZES": [512]}})
+    for i in range(WAYS):
+        cache.set(f"key{i}", i)
+    cache.get("key0")
+    cache.set("new", "value")
+    assert cache.get("key0") == 0
+    assert cache.get("key1") is None
+    assert cache.get("new") == "value"
+
+
+def test_shared_cache_as_default_cache(settings, tmp_path, users, status_new):
+    settings.CACHES = {"default": {
+        "BACKEND": "task_manager.shared_cache.SharedMemoryCache",
+        "LOCATION": str(tmp_path / "cache"),
+    }}
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.cache"
+    client = Client()
+    client.force_login(users["u1"])
+    response = client.get(reverse("tasks:create"))
+    assert response.status_code == 200
+    assert status_new.name in response.content.decode()
+
+
+def test_replica_routing(settings):
+    settings.DATABASE_REPLICAS = ["replica1"]
+    settings.REPLICA_PIN_SECONDS = 30
+    routed = []
+
+    def view(request):
+        routed.append((router.db_for_read(Task),
+                       router.db_for_read(Session)))
+        return HttpResponse()
+
+    middleware = ReplicaMiddleware(view)
+    factory = RequestFactory()
+    middleware(factory.get("/tasks/"))
+    response = middleware(factory.post("/tasks/create/"))
+    pinned = factory.get("/tasks/")
+    pinned.COOKIES["primary_until"] = response.cookies["primary_until"].value
+    middleware(pinned)
+
+    assert routed == [("replica1", "default"), ("default", "default"),
+                      ("default", "default")]
+    assert router.db_for_read(Task) == "default"
+    assert router.db_for_write(Task) == "default"
+    assert not router.allow_migrate("replica1", "tasks")
+
+
+def test_sync_replicas_copies_sqlite(tmp_path):
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    with sqlite3.connect(primary) as db:
+        db.execute("CREATE TABLE t (x)")
+        db.execute("INSERT INTO t VALUES (1)")
+    copy_sqlite(primary, replica)
+    with sqlite3.connect(replica) as db:
+        assert db.execute("SELECT x FROM t").fetchall() == [(1,)]
+
+
+def test_sqlite_tuning(db):
+    if connection.vendor != "sqlite":
+        pytest.skip("SQLite only")
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA busy_timeout")
+        assert cursor.fetchone() == (10000,)
+    assert connection.transaction_mode == "IMMEDIATE"
+
+
+def test_warm_up(db, monkeypatch, caplog):
+    def broken():
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(warmup.STEPS, "broken", broken)
+    timings = warmup.warm_up()
+    assert set(timings) == {"urls", "translations", "templates", "database",
+                            "forms", "password_validators", "broken"}
+    assert "Warm-up step broken failed" in caplog.text
+    assert connection.connection is not None
+    assert get_template("base.html")
+
+
+def test_startup_profile():
+    modules = parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   django.utils\n"
+        "import time:        80 |        200 | django\n"
+        "import time:        30 |         30 | task_manager.tasks\n")
+    assert modules == {"django.utils": 120, "django": 80,
+                       "task_manager.tasks": 30}
+    assert aggregate(modules, 1) == {"django": [200, 2],
+                                     "task_manager": [30, 1]}
+
+    out = io.StringIO()
+    call_command("startup_profile", "--target", "command", "--repeat", "1",
+                 stdout=out)
+    assert "task_manager" in out.getvalue()
+
+
+def error_reports(outcome):
+    return registry.values.get(("error_reports_total",
+                                (("outcome", outcome),)), 0)
+
+
+def test_report_queue_sheds_load(monkeypatch):
+    sending, release, sent = threading.Event(), threading.Event(), []
+
+    def send(batch):
+        sending.set()
+        release.wait(5)
+        sent.extend(batch)
+
+    reports = reporting.ReportQueue(send, size=4, interval=0)
+    assert reports.put("first", 0)
+    assert sending.wait(5)  # the thread now holds "first"
+    monkeypatch.setattr(reporting.random, "random", lambda: 0.99)
+    outcomes = [reports.put(key, i) for i, key in enumerate("abcd", 1)]
+    assert outcomes == [True, True, True, False]  # d: sampled
+    monkeypatch.setattr(reporting.random, "random", lambda: 0.0)
+    assert reports.put("e", 5)
+    assert not reports.put("f", 6)  # full: dropped
+    assert not reports.put("a", 7)  # duplicate
+    release.set()
+    assert reports.flush(timeout=5)
+    assert sent == [(0, 0), (1, 0), (2, 0), (3, 0), (5, 0)]
+
+
+def test_rollbar_reports_in_background(settings, rollbar_endpoint, users):
+    settings.ROLLBAR = {"access_token": "token", "environment": "test",
+                        "endpoint": rollbar_endpoint.url,
+                        "patch_debugview": False, "capture_ip": "anonymize",
+                        "suppress_reinit_warning": True}
+    settings.ROLLBAR_FLUSH_INTERVAL = 0.01
+    middleware = RollbarMiddleware(lambda request: HttpResponse())
+    request = RequestFactory().post("/tasks/create/",
+                                    {"name": "x", "note": "private"})
+    request.user = users["u1"]
+    request.sensitive_post_parameters = ["note"]
+    sent, deduplicated = error_reports("sent"), error_reports("deduplicated")
+    frames = []
+
+    def raise_(exception_class):
+        secret = "local"  # noqa: F841
+        raise exception_class("boom")
+
+    def fail(exception_class):
+        try:
+            raise_(exception_class)
+        except Exception as exc:
+            middleware.process_exception(request, exc)
+            frames.append(exc.__traceback__.tb_next.tb_frame)
+
+    for _ in range(3):
+        fail(RuntimeError)
+    fail(ValueError)
+    assert middleware.reports.flush(timeout=10)
+    middleware.reports.dedupe_seconds = 0
+    fail(RuntimeError)
+    assert middleware.reports.flush(timeout=10)
+    try:
+        try:
+            raise KeyError("inner")
+        except KeyError as inner:
+            raise TypeError("outer") from inner
+    except TypeError as exc:
+        middleware.process_exception(request, exc)
+    assert middleware.reports.flush(timeout=10)
+
+    *items, chained = [item["data"] for item in rollbar_endpoint.items]
+    assert [item["body"]["trace"]["exception"]["class"]
+            for item in items] == ["RuntimeError", "ValueError",
+                                   "RuntimeError"]
+    frame = items[0]["body"]["trace"]["frames"][-1]
+    assert frame["method"] == "raise_"
+    assert frame["code"] == "raise exception_class(\"boom\")"
+    assert [trace["exception"]["class"]
+            for trace in chained["body"]["trace_chain"]] == [
+        "TypeError", "KeyError"]
+    assert items[-1]["custom"] == {"duplicates_since_last_report": 2}
+    assert items[0]["request"]["url"] == "http://testserver/tasks/create/"
+    assert items[0]["request"]["POST"] == {"name": ["x"],
+                                           "note": ["******"]}
+    assert items[0]["request"]["user_ip"] == "127.0.0.0"
+    assert items[0]["person"] == {"id": str(users["u1"].pk)}
+    # A summary was queued; the frames Django's handlers see are intact.
+    assert all(frame.f_locals["secret"] == "local" for frame in frames)
+    assert error_reports("sent") - sent == 4
+    assert error_reports("deduplicated") - deduplicated == 2
+
+    settings.ROLLBAR = {"access_token": None}
+    with pytest.raises(MiddlewareNotUsed):
+        RollbarMiddleware(lambda request: HttpResponse())
@@ -0,0 +1,99 @@
+"""``Server-Timing`` header and per-request phase log.
+
+``ServerTimingMiddleware`` goes first in ``MIDDLEWARE`` and
+``ServerTimingViewMiddleware`` last. Between them they split a request
+into phases:
+
+- ``req``: middleware before the view (sessions, auth, CSRF, Rollbar);
+- ``view``: the view itself, minus template rendering;
+- ``tpl``: rendering the ``TemplateResponse`` (bootstrap tags, forms);
+- ``resp``: middleware after the view (session save, messages);
+- ``db``: time spent in SQL, whichever phase ran it;
+- ``total``.
+
+Streaming bodies are produced after the middleware returns and are not
+included. Both classes remove themselves from the stack unless
+``settings.SERVER_TIMING`` is on.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentation import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        request.server_timing = marks = {"tpl": 0.0}
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        finished = time.perf_counter()
+        # Without the view middleware mark (e.g. a middleware answered
+        # early) everything counts as request middleware.
+        entered = marks.get("entered", finished)
+        left = marks.get("left", finished)
+        phases = {
+            "req": entered - started,
+            "view": left - entered - marks["tpl"],
+            "tpl": marks["tpl"],
+            "resp": finished - left,
+            "db": recorder.duration,
+            "total": finished - started,
+        }
+        timing = {name: _ms(seconds) for name, seconds in phases.items()}
+        metrics = [f"{name};dur={ms}" for name, ms in timing.items()]
+        metrics.append(f'queries;desc="{recorder.count} queries"')
+        response.headers["Server-Timing"] = ", ".join(metrics)
+        logger.info(
+            "%s %s %s %s queries=%d", request.method, request.path,
+            response.status_code,
+            " ".join(f"{name}={ms}ms" for name, ms in timing.items()),
+            recorder.count,
+            extra={"method": request.method, "path": request.path,
+                   "status": response.status_code, "queries": recorder.count,
+                   "timing": timing},
+        )
+        return response
+
+
+class ServerTimingViewMiddleware:
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        marks = getattr(request, "server_timing", None)
+        if marks is None:
+            return self.get_response(request)
+        marks["entered"] = time.perf_counter()
+        response = self.get_response(request)
+        marks["left"] = time.perf_counter()
+        return response
+
+    def process_template_response(self, request, response):
+        marks = getattr(request, "server_timing", None)
+        if marks is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                marks["tpl"] += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
@@ -18,7 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from . import views
 from .users.views import UserLoginView, UserLogoutView
-from .views import rollbar_test
+from .views import metrics, rollbar_test
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -30,4 +30,5 @@ urlpatterns = [
     path("login/", UserLoginView.as_view(), name="login"),
     path("logout/", UserLogoutView.as_view(), name="logout"),
     path('rollbar-test/', rollbar_test),
+    path("metrics", metrics, name="metrics"),
 ]
@@ -0,0 +1,46 @@
+"""Authentication backend that caches the logged-in user.
+
+``AuthenticationMiddleware`` loads the user of every request through the
+backend's ``get_user``; with ``CACHED_AUTH`` on, that is a cache read
+instead of an ``auth_user`` query. Saving or deleting a user (profile
+update, password change, account deletion) drops the cached copy; the
+session auth hash still logs out other sessions after a password change.
+Writes with ``QuerySet.update()`` bypass this and stay cached for up to
+``USER_TIMEOUT`` seconds.
+"""
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+USER_KEY = "auth_user:{}"
+USER_TIMEOUT = 300
+
+
+def invalidate_user(user_id):
+    key = USER_KEY.format(user_id)
+    cache.delete(key)
+    # A request reading before the commit may have cached the old row.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = USER_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, USER_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        key = USER_KEY.format(user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is None:
+                return None
+            await cache.aset(key, user, USER_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+SEARCH_FIELDS = ['username', 'first_name', 'last_name']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=f'CREATE INDEX auth_user_lower_{field}_idx '
+                f'ON auth_user (LOWER({field}))',
+            reverse_sql=f'DROP INDEX auth_user_lower_{field}_idx',
+        )
+        for field in SEARCH_FIELDS
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+SEARCH_FIELDS = ['username', 'first_name', 'last_name']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_user_search_indexes'),
+    ]
+
+    # Autocomplete pages are read in (LOWER(field), id) order straight
+    # from these indexes.
+    operations = [
+        migrations.RunSQL(
+            sql=[f'DROP INDEX auth_user_lower_{field}_idx',
+                 f'CREATE INDEX auth_user_lower_{field}_id_idx '
+                 f'ON auth_user (LOWER({field}), id)'],
+            reverse_sql=[f'DROP INDEX auth_user_lower_{field}_id_idx',
+                         f'CREATE INDEX auth_user_lower_{field}_idx '
+                         f'ON auth_user (LOWER({field}))'],
+        )
+        for field in SEARCH_FIELDS
+    ]
@@ -0,0 +1,19 @@
+from inspect import isawaitable
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """LoginRequiredMixin for views whose handlers are ``async def``.
+
+    The user is loaded with ``request.auser()`` and stored on the request,
+    so later sync code (templates, context processors) does not query the
+    database from the event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        response = super().dispatch(request, *args, **kwargs)
+        if isawaitable(response):
+            response = await response
+        return response
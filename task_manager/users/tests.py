@@ -262,3 +262,111 @@ def test_user_with_tasks_cannot_be_deleted(users, status_new):
     r = c.post(url)
     assert r.status_code in (302, 301)
     assert User.objects.filter(pk=users["bob"].pk).exists()
+
+
+@pytest.mark.django_db
+def test_users_list_not_modified_until_user_changes(client, users):
+    url = reverse("users:list")
+    first = client.get(url)
+    assert client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code \
+        == 304
+    client.login(username="alice", password=users["password"])
+    assert client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code \
+        == 200
+    client.logout()
+    bob = users["bob"]
+    bob.first_name = "Robert"
+    bob.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code \
+        == 200
+
+
+@pytest.mark.parametrize("method, name, data", [
+    ("get", "users:list", None),
+    ("get", "users:update", None),
+    ("post", "users:update", {"username": "renamed", "first_name": "R",
+                              "last_name": "R"}),
+    ("get", "users:delete", None),
+    ("post", "users:delete", None),
+])
+def test_views_within_query_budget(seeded, assert_query_budget, method, name,
+                                   data):
+    args = [] if name == "users:list" else [seeded["user"].pk]
+    assert_query_budget(seeded["client"], reverse(name, args=args), method,
+                        data)
+
+
+def test_anonymous_views_within_query_budget(seeded, assert_query_budget,
+                                             client):
+    assert_query_budget(client, reverse("users:list"))
+    assert_query_budget(client, reverse("users:create"), "post", {
+        "username": "charlie", "first_name": "Charlie", "last_name": "C",
+        "password1": "Register123", "password2": "Register123",
+    })
+    assert_query_budget(client, reverse("login"), "post", {
+        "username": "charlie", "password": "Register123"})
+    charlie = User.objects.get(username="charlie")
+    assert_query_budget(client, reverse("users:delete", args=[charlie.pk]),
+                        "post")
+    assert not User.objects.filter(pk=charlie.pk).exists()
+
+
+@pytest.fixture
+def enable_cached_auth(settings):
+    from django.core.cache import cache
+
+    def enable():
+        settings.SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+        settings.AUTHENTICATION_BACKENDS = [
+            "task_manager.users.backends.CachedModelBackend"]
+        cache.clear()
+
+    yield enable
+    cache.clear()
+
+
+def count_page_queries(client):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    url = reverse("statuses:index")
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(url).status_code == 200
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_cached_auth_saves_session_and_user_queries(enable_cached_auth,
+                                                    users):
+    uncached = Client()
+    uncached.force_login(users["alice"])
+    before = count_page_queries(uncached)
+
+    enable_cached_auth()
+    cached = Client()
+    cached.login(username="alice", password=users["password"])
+    assert count_page_queries(cached) == before - 2
+
+
+@pytest.mark.django_db
+def test_cached_user_is_invalidated(enable_cached_auth, users):
+    enable_cached_auth()
+    alice, other_session = Client(), Client()
+    for client in (alice, other_session):
+        client.login(username="alice", password=users["password"])
+        client.get(reverse("statuses:index"))
+
+    alice.post(reverse("users:update", args=[users["alice"].pk]),
+               {"username": "alice", "first_name": "Al", "last_name": "A",
+                "password1": "Secur3Pass!234", "password2": "Secur3Pass!234"})
+    response = other_session.get(reverse("statuses:index"))
+    assert response.status_code == 302
+
+    alice.login(username="alice", password="Secur3Pass!234")
+    response = alice.get(reverse("statuses:index"))
+    assert response.wsgi_request.user.first_name == "Al"
+
+    alice.post(reverse("users:delete", args=[users["alice"].pk]))
+    response = alice.get(reverse("statuses:index"))
+    assert response.status_code == 302
@@ -9,17 +9,30 @@ from django.contrib import messages
 from django.contrib.auth import logout, password_validation
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from task_manager.tasks.models import CollectionVersion, Task
+from task_manager.tasks.versions import ConditionalGetMixin
+
 User = get_user_model()
 
 
-class UserListView(ListView):
+class UserListView(ConditionalGetMixin, ListView):
     model = User
+    collections = [CollectionVersion.USERS]
     template_name = "users/index.html"
     context_object_name = "users"
     ordering = ["username"]
+    query_budget = 4
 
 
 class OnlySelfMixin(UserPassesTestMixin):
+    def get_object(self, queryset=None):
+        # Only the user themselves may pass, and they are already loaded.
+        if self.kwargs.get("pk") == self.request.user.pk:
+            return self.request.user
+        return super().get_object(queryset)
+
     def test_func(self):
         obj = self.get_object()
         return (self.request.user.is_authenticated and 
@@ -39,6 +52,7 @@ class UserCreateView(CreateView):
     form_class = CustomUserCreationForm
     template_name = "users/create.html"
     success_url = reverse_lazy("login")
+    query_budget = 6
 
     def form_valid(self, form):
         response = super().form_valid(form)
@@ -51,6 +65,7 @@ class UserUpdateView(OnlySelfMixin, UpdateView):
     fields = ["username", "first_name", "last_name"]
     template_name = "users/update.html"
     success_url = reverse_lazy("users:list")
+    query_budget = 5
 
     def get_object(self, queryset=None):
         return self.request.user
@@ -94,22 +109,23 @@ class UserDeleteView(OnlySelfMixin, LoginRequiredMixin, DeleteView):
     template_name = "users/confirm_delete.html"
     success_url = reverse_lazy("users:list")
     login_url = "login"
+    query_budget = 10
 
-    def post(self, request, *args, **kwargs):
-        user = self.get_object()
-        if (hasattr(user, "created_tasks") and user.created_tasks.exists()) or \
-           (hasattr(user, "executed_tasks") and user.executed_tasks.exists()):
-            messages.error(request,
+    def form_valid(self, form):
+        user = self.object
+        if Task.objects.filter(Q(author=user) | Q(executor=user)).exists():
+            messages.error(self.request,
                            "Cannot delete user because they are in use")
             return redirect("users:list")
-        messages.success(request, "User deleted successfully")
-        return super().post(request, *args, **kwargs)
+        messages.success(self.request, "User deleted successfully")
+        return super().form_valid(form)
 
 
 class UserLoginView(LoginView):
     template_name = "users/login.html"
     form_class = CustomAuthenticationForm
     next_page = reverse_lazy("home")
+    query_budget = 9
 
     def form_valid(self, form):
         messages.success(self.request, "You are logged in")
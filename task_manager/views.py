@@ -1,13 +1,35 @@
-from django.http import Http404
+from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 from django.conf import settings
+from django.utils.crypto import constant_time_compare
 
+from .instrumentation import query_budget
+from .metrics import registry
+from .tasks.counters import dashboard
 
+
+@query_budget(10)
 def index(request):
-    return render(request, "index.html")
+    context = {}
+    if request.user.is_authenticated:
+        context["dashboard"] = dashboard(request.user)
+    return render(request, "index.html", context)
 
 
 def rollbar_test(request):
     if not settings.DEBUG:
         raise Http404("Not found")
     raise RuntimeError("Rollbar test: artificial error for verification")
+
+
+@query_budget(0)
+def metrics(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404("Not found")
+    if settings.METRICS_TOKEN and not constant_time_compare(
+            request.headers.get("Authorization", ""),
+            f"Bearer {settings.METRICS_TOKEN}"):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(),
+                        content_type="text/plain; version=0.0.4; "
+                                     "charset=utf-8")
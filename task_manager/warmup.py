@@ -0,0 +1,94 @@
+"""Work a new worker does once, before it takes its first request.
+
+Without it the first requests a worker serves after a deploy or a
+recycle pay for populating the URL resolvers, loading the translation
+catalogs, compiling the templates (and the django-bootstrap5 tags they
+load), building the task filter form and the form widget templates,
+reading the common-password list and connecting to the database.
+
+``gunicorn.conf.py`` calls ``warm_up`` from ``post_worker_init``, after
+the worker has loaded the application and before it accepts
+connections, unless ``settings.WARM_UP`` is off. A failing step is
+logged and skipped: a cold worker is better than no worker.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.password_validation import (
+    get_default_password_validators,
+)
+from django.db import connections
+from django.template import engines
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def warm_urls():
+    def populate(resolver):
+        resolver.pattern.regex
+        resolver.reverse_dict
+        for pattern in resolver.url_patterns:
+            if isinstance(pattern, URLResolver):
+                populate(pattern)
+            else:
+                pattern.pattern.regex
+
+    populate(get_resolver())
+
+
+def warm_translations():
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext("Tasks")
+
+
+def warm_templates():
+    for engine in engines.all():
+        for directory in getattr(engine, "dirs", ()):
+            for path in sorted(Path(directory).rglob("*.html")):
+                engine.get_template(path.relative_to(directory).as_posix())
+
+
+def warm_forms():
+    from task_manager.tasks.filters import TaskFilter
+    from task_manager.tasks.models import Task
+
+    str(TaskFilter(queryset=Task.objects.none()).form)
+
+
+def warm_password_validators():
+    get_default_password_validators()
+
+
+def warm_database():
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+STEPS = {
+    "urls": warm_urls,
+    "translations": warm_translations,
+    "templates": warm_templates,
+    "database": warm_database,
+    "forms": warm_forms,
+    "password_validators": warm_password_validators,
+}
+
+
+def warm_up():
+    """Run every step; return the milliseconds each took."""
+    timings = {}
+    for name, step in STEPS.items():
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+        timings[name] = (time.perf_counter() - started) * 1000
+    logger.info("Warmed up in %.1f ms: %s", sum(timings.values()),
+                ", ".join(f"{name} {ms:.1f}" for name, ms in timings.items()))
+    return timings